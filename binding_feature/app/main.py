@@ -1,10 +1,11 @@
 import asyncio
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
 from database import db_manager
@@ -18,6 +19,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Cached device_analytics row count for /health (refreshed every few seconds)
+HEALTH_CACHE_TTL_SECONDS = 5.0
+_HEALTH_CACHE = {"ts": 0.0, "count": 0}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -25,6 +30,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Schnell Storage Add-on...")
 
+    app.state.tasks = []
+
     try:
         # Initialize database
         await db_manager.init_database()
@@ -32,7 +39,7 @@ async def lifespan(app: FastAPI):
 
         # Start WebSocket client in background if token is provided
         if os.getenv("HA_TOKEN"):
-            asyncio.create_task(websocket_manager.start())
+            _start_background_task(app, websocket_manager.start(), "ws")
             logger.info("WebSocket manager started")
         else:
             logger.warning(
@@ -40,7 +47,7 @@ async def lifespan(app: FastAPI):
 
         # Schedule automatic backups if enabled
         if os.getenv("AUTO_BACKUP", "true").lower() == "true":
-            asyncio.create_task(schedule_backups())
+            _start_background_task(app, schedule_backups(), "backups")
             logger.info("Automatic backup scheduler started")
 
     except Exception as e:
@@ -52,6 +59,26 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Schnell Storage Add-on...")
     await websocket_manager.stop()
+    for task in app.state.tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.tasks, return_exceptions=True)
+
+
+def _start_background_task(app: FastAPI, coro, name: str) -> asyncio.Task:
+    """Start a background task and keep a reference so it cannot be GC'd"""
+    task = asyncio.create_task(coro, name=name)
+    task.add_done_callback(_log_task_exit)
+    app.state.tasks.append(task)
+    return task
+
+
+def _log_task_exit(task: asyncio.Task):
+    """Log background tasks that die unexpectedly"""
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(f"Background task {task.get_name()} crashed: {exc!r}")
 
 
 async def schedule_backups():
@@ -59,9 +86,14 @@ async def schedule_backups():
     backup_interval_hours = int(os.getenv("BACKUP_INTERVAL_HOURS", "24"))
     backup_interval_seconds = backup_interval_hours * 3600
 
+    # Sleep towards a fixed monotonic deadline so the time spent backing up
+    # does not push every following backup later. A backup that overruns its
+    # slot skips the missed ones instead of running them back to back
+    deadline = time.monotonic() + backup_interval_seconds
     while True:
         try:
-            await asyncio.sleep(backup_interval_seconds)
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+            deadline = max(deadline + backup_interval_seconds, time.monotonic())
             await db_manager.backup_database()
             logger.info("Automatic backup completed")
         except Exception as e:
@@ -74,6 +106,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -113,9 +146,14 @@ async def root():
 async def health():
     """Global health check endpoint"""
     try:
-        async with db_manager.get_connection() as db:
-            cursor = await db.execute("SELECT COUNT(*) FROM device_analytics")
-            total_records = (await cursor.fetchone())[0]
+        now = time.monotonic()
+        if _HEALTH_CACHE["ts"] and now - _HEALTH_CACHE["ts"] < HEALTH_CACHE_TTL_SECONDS:
+            total_records = _HEALTH_CACHE["count"]
+        else:
+            async with db_manager.get_connection() as db:
+                cursor = await db.execute("SELECT COUNT(*) FROM device_analytics")
+                total_records = (await cursor.fetchone())[0]
+            _HEALTH_CACHE.update(ts=now, count=total_records)
 
         return {
             "status": "healthy",
@@ -126,7 +164,7 @@ async def health():
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=503,
             content={
                 "status": "unhealthy",
@@ -140,7 +178,7 @@ async def health():
 
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={"error": "Endpoint not found",
                  "message": "The requested endpoint does not exist"}
@@ -150,7 +188,7 @@ async def not_found_handler(request, exc):
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f"Internal server error: {exc}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error",
                  "message": "An unexpected error occurred"}
@@ -162,6 +200,8 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8080,
+        loop="uvloop",
+        http="httptools",
         log_level=os.getenv("LOG_LEVEL", "info").lower(),
         reload=False
     )
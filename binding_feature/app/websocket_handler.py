@@ -1,22 +1,34 @@
 import asyncio
 import websockets
 import json
+import orjson
 import logging
 import os
+import random
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Any
 from database import db_manager
 
 logger = logging.getLogger(__name__)
 
+# Home Assistant event types the add-on records
+SUBSCRIBED_EVENT_TYPES = ("state_changed", "automation_triggered", "scene_activated")
+
 class HomeAssistantWebSocketClient:
     def __init__(self):
-        self.websocket = None
+        self.websocket: Any = None
         self.ha_token = os.getenv("HA_TOKEN", "")
         self.ha_url = "ws://supervisor/core/websocket"  # Internal supervisor URL
         self.message_id = 1
         self.is_connected = False
-        self.reconnect_interval = 30
+        self.min_reconnect_interval = 1.0
+        self.max_reconnect_interval = 300.0
+        # Event type -> handler, looked up once per incoming event
+        self._dispatch = {
+            "state_changed": self.process_state_change,
+            "automation_triggered": self.process_automation_event,
+            "scene_activated": self.process_scene_event,
+        }
         
     async def connect(self):
         """Connect to Home Assistant WebSocket API"""
@@ -26,7 +38,8 @@ class HomeAssistantWebSocketClient:
                 return False
                 
             logger.info(f"Connecting to Home Assistant WebSocket: {self.ha_url}")
-            self.websocket = await websockets.connect(self.ha_url)
+            # HA event frames can exceed the 1 MiB websockets default
+            self.websocket = await websockets.connect(self.ha_url, max_size=2**22)
             
             # Receive auth required message
             auth_required = await self.websocket.recv()
@@ -65,32 +78,17 @@ class HomeAssistantWebSocketClient:
             return
             
         try:
-            # Subscribe to state changes
-            subscribe_message = {
-                "id": self.message_id,
-                "type": "subscribe_events",
-                "event_type": "state_changed"
-            }
-            await self.websocket.send(json.dumps(subscribe_message))
-            self.message_id += 1
-            
-            # Subscribe to automation events
-            automation_message = {
-                "id": self.message_id,
-                "type": "subscribe_events",
-                "event_type": "automation_triggered"
-            }
-            await self.websocket.send(json.dumps(automation_message))
-            self.message_id += 1
-            
-            # Subscribe to scene events
-            scene_message = {
-                "id": self.message_id,
-                "type": "subscribe_events",
-                "event_type": "scene_activated"
-            }
-            await self.websocket.send(json.dumps(scene_message))
-            self.message_id += 1
+            # Build every subscription up front and send them back-to-back
+            # instead of awaiting each one in turn
+            messages = []
+            for event_type in SUBSCRIBED_EVENT_TYPES:
+                messages.append(json.dumps({
+                    "id": self.message_id,
+                    "type": "subscribe_events",
+                    "event_type": event_type
+                }))
+                self.message_id += 1
+            await asyncio.gather(*(self.websocket.send(m) for m in messages))
             
             logger.info("Subscribed to Home Assistant events")
             
@@ -100,50 +98,54 @@ class HomeAssistantWebSocketClient:
     async def listen_for_events(self):
         """Listen for and process Home Assistant events"""
         try:
-            while self.is_connected:
-                message = await self.websocket.recv()
-                data = json.loads(message)
+            async for message in self.websocket:
+                # orjson parses the frame (str or bytes) straight from UTF-8
+                data = orjson.loads(message)
                 
                 if data.get("type") == "event":
                     await self.process_event(data.get("event", {}))
-                    
+
+                # Yield to other tasks between events under sustained streams
+                await asyncio.sleep(0)
+
+            # Iteration ends without an exception on a clean close
+            logger.warning("WebSocket connection closed")
+            self.is_connected = False
+
         except websockets.exceptions.ConnectionClosed:
             logger.warning("WebSocket connection closed")
             self.is_connected = False
         except Exception as e:
-            logger.error(f"Error listening for events: {e}")
+            logger.error("Error listening for events: %s", e)
             self.is_connected = False
     
-    async def process_event(self, event: Dict[str, Any]):
+    async def process_event(self, event: dict) -> None:
         """Process incoming Home Assistant events"""
         try:
-            event_type = event.get("event_type")
-            event_data = event.get("data", {})
-            
-            if event_type == "state_changed":
-                await self.process_state_change(event_data)
-            elif event_type == "automation_triggered":
-                await self.process_automation_event(event_data)
-            elif event_type == "scene_activated":
-                await self.process_scene_event(event_data)
+            handler = self._dispatch.get(event.get("event_type"))
+            if handler is not None:
+                await handler(event.get("data", {}))
                 
         except Exception as e:
-            logger.error(f"Error processing event: {e}")
+            logger.error("Error processing event: %s", e)
     
-    async def process_state_change(self, data: Dict[str, Any]):
+    async def process_state_change(self, data: dict) -> None:
         """Process state change events"""
         try:
-            entity_id = data.get("entity_id")
-            new_state = data.get("new_state", {})
-            old_state = data.get("old_state", {})
-            
-            if not entity_id or not new_state:
+            # Direct indexing is the fast path; a malformed event is skipped
+            try:
+                entity_id = data["entity_id"]
+                new_state = data["new_state"]
+                if not entity_id or not new_state:
+                    return
+                state_value = new_state["state"]
+            except KeyError:
                 return
+            old_state = data.get("old_state")
+            attributes = new_state.get("attributes") or {}
             
             # Extract device information
-            device_type = entity_id.split(".")[0]
-            state_value = new_state.get("state")
-            attributes = new_state.get("attributes", {})
+            device_type = entity_id.split(".", 1)[0]
             
             # Store device analytics
             async with db_manager.get_connection() as db:
@@ -166,9 +168,9 @@ class HomeAssistantWebSocketClient:
                 await self.update_reliability_metrics(entity_id, state_value, attributes)
                 
         except Exception as e:
-            logger.error(f"Error processing state change: {e}")
+            logger.error("Error processing state change: %s", e)
     
-    async def process_automation_event(self, data: Dict[str, Any]):
+    async def process_automation_event(self, data: dict) -> None:
         """Process automation triggered events"""
         try:
             automation_id = data.get("entity_id", "")
@@ -184,16 +186,16 @@ class HomeAssistantWebSocketClient:
                     automation_id,
                     automation_name,
                     trigger.get("platform", "unknown"),
-                    json.dumps(trigger),
+                    orjson.dumps(trigger).decode(),
                     True,
                     datetime.now()
                 ))
                 await db.commit()
                 
         except Exception as e:
-            logger.error(f"Error processing automation event: {e}")
+            logger.error("Error processing automation event: %s", e)
     
-    async def process_scene_event(self, data: Dict[str, Any]):
+    async def process_scene_event(self, data: dict) -> None:
         """Process scene activated events"""
         try:
             scene_id = data.get("entity_id", "")
@@ -214,9 +216,9 @@ class HomeAssistantWebSocketClient:
                 await db.commit()
                 
         except Exception as e:
-            logger.error(f"Error processing scene event: {e}")
+            logger.error("Error processing scene event: %s", e)
     
-    async def update_reliability_metrics(self, entity_id: str, state: str, attributes: Dict[str, Any]):
+    async def update_reliability_metrics(self, entity_id: str, state: str, attributes: dict) -> None:
         """Update reliability metrics for a device"""
         try:
             # Determine if device is online/offline
@@ -254,7 +256,7 @@ class HomeAssistantWebSocketClient:
                 await db.commit()
                 
         except Exception as e:
-            logger.error(f"Error updating reliability metrics: {e}")
+            logger.error("Error updating reliability metrics: %s", e)
     
     async def disconnect(self):
         """Disconnect from Home Assistant WebSocket"""
@@ -267,24 +269,34 @@ class WebSocketManager:
     def __init__(self):
         self.client = HomeAssistantWebSocketClient()
         self.running = False
+        self._backoff = self.client.min_reconnect_interval
     
     async def start(self):
         """Start WebSocket client with auto-reconnect"""
         self.running = True
         
         while self.running:
+            connected = False
             try:
                 if await self.client.connect():
+                    connected = True
+                    # Authenticated: the next drop starts over from the shortest delay
+                    self._backoff = self.client.min_reconnect_interval
                     await self.client.subscribe_to_events()
                     await self.client.listen_for_events()
-                else:
-                    logger.warning("Failed to connect, retrying in 30 seconds...")
                     
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
             
             if self.running:
-                await asyncio.sleep(self.client.reconnect_interval)
+                # Exponential backoff with jitter so add-ons don't reconnect in lockstep
+                delay = self._backoff * (0.5 + random.random())
+                if connected:
+                    logger.warning(f"WebSocket connection lost, reconnecting in {delay:.1f} seconds...")
+                else:
+                    logger.warning(f"Failed to connect, retrying in {delay:.1f} seconds...")
+                await asyncio.sleep(delay)
+                self._backoff = min(self._backoff * 2, self.client.max_reconnect_interval)
     
     async def stop(self):
         """Stop WebSocket client"""
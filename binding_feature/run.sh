@@ -34,6 +34,8 @@ cd /app
 exec uvicorn main:app \
     --host 0.0.0.0 \
     --port 8080 \
+    --loop uvloop \
+    --http httptools \
     --log-level "$LOG_LEVEL" \
     --access-log \
     --reload
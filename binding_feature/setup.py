@@ -0,0 +1,14 @@
+"""mypyc build of the per-event WebSocket handler.
+
+Run by the Dockerfile's mypyc build stage with
+``python3 setup.py build_ext --inplace``. The compiled extension is copied
+next to ``websocket_handler.py`` in the runtime image and takes precedence
+on import.
+"""
+from setuptools import setup
+from mypyc.build import mypycify
+
+setup(
+    name="binding_feature_ext",
+    ext_modules=mypycify(["websocket_handler.py"]),
+)
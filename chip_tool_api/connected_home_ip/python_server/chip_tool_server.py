@@ -1,51 +1,289 @@
 # File: chip_tool_server.py
 # Fixed version with better error handling and logging
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, url_for
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Annotated
+import gzip
 import subprocess
 import logging
+import msgspec
+import orjson
+import os
+import re
+import select
+import selectors
+import shlex
+import signal
+import threading
+import time
+import uuid
+
+
+class OrjsonProvider(JSONProvider):
+    """Serialize jsonify() responses with orjson instead of the stdlib json module"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Allow all origins
 
 # Configure logging
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 CHIP_TOOL_PATH = "/app/connected_home_ip/out/chip-tool-linux/chip-tool"
+CHIP_TOOL_TIMEOUT = 60
+# Commissioning can log megabytes; only the end of each stream is returned
+OUTPUT_TAIL_BYTES = 64 * 1024
+# chip-tool colours its log lines; the escapes are noise in a JSON response
+ANSI_ESCAPE = re.compile(rb"\x1b\[[0-9;]*m")
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+
+# Set CHIP_TOOL_INTERACTIVE=1 to keep one `chip-tool interactive start` process
+# and its CASE sessions alive between requests instead of exec'ing per command
+CHIP_TOOL_INTERACTIVE = os.environ.get("CHIP_TOOL_INTERACTIVE") == "1"
+INTERACTIVE_PROMPT = b">>> "
+
+# /bind payloads; only the node and endpoint numbers vary per request
+ACL_TEMPLATE = (
+    '[{"fabricIndex": 1, "privilege": 5, "authMode": 2, "subjects": null, "targets": null}, '
+    '{"fabricIndex": 1, "privilege": 3, "authMode": 2, "subjects": [%s], "targets": null}]'
+)
+BINDING_TEMPLATE = '[{"node":%s, "endpoint":%s, "cluster":6}]'
+
+# chip-tool keeps its fabric and node state in shared storage files, so
+# concurrent runs would clobber each other; a single worker serializes them
+chip_tool_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chip-tool")
+
+# task_id -> (submitted_at, Future) for requests queued with "wait": false
+TASK_RETENTION = 600  # seconds a queued task stays available for polling
+# Longest a waiting request blocks: /bind runs two commands, plus slack for
+# queueing. Past this the client gets a task id to poll instead
+WAIT_TIMEOUT = 2 * CHIP_TOOL_TIMEOUT + 10
+tasks = {}
+tasks_lock = threading.Lock()
+
+# Attribute reads are idempotent, so identical ones share a result: a read
+# already queued is joined, and a successful one is reused for a few seconds
+READ_VERBS = ("read", "read-by-id")
+READ_CACHE_TTL = 5
+read_cache = {}  # tuple(args) -> (completed_at, result)
+read_inflight = {}  # tuple(args) -> Future
+read_lock = threading.Lock()
+
+
+class OutputTail:
+    """Accumulates a stream but keeps only its last OUTPUT_TAIL_BYTES"""
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.truncated = False
+
+    def append(self, chunk):
+        self.buf += chunk
+        # Trim in batches so a long stream isn't re-sliced on every chunk
+        if len(self.buf) > 2 * OUTPUT_TAIL_BYTES:
+            del self.buf[:-OUTPUT_TAIL_BYTES]
+            self.truncated = True
+
+    def text(self):
+        data = self.buf
+        if self.truncated or len(data) > OUTPUT_TAIL_BYTES:
+            # Start on a whole line
+            data = data[-OUTPUT_TAIL_BYTES:]
+            data = data[data.find(b"\n") + 1:]
+        return ANSI_ESCAPE.sub(b"", data).decode(errors="replace")
+
+
+def read_output(proc, timeout):
+    """Drain proc's stdout and stderr until EOF, returning the tail of each"""
+    tails = {proc.stdout.fileno(): OutputTail(), proc.stderr.fileno(): OutputTail()}
+    deadline = time.monotonic() + timeout
+    with selectors.DefaultSelector() as selector:
+        for fd in tails:
+            selector.register(fd, selectors.EVENT_READ)
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, 65536)
+                if chunk:
+                    tails[key.fd].append(chunk)
+                else:
+                    selector.unregister(key.fd)
+    proc.wait(timeout=max(0, deadline - time.monotonic()))
+    return tails[proc.stdout.fileno()].text(), tails[proc.stderr.fileno()].text()
+
+
+def kill_process_group(proc):
+    """SIGTERM a chip-tool started with start_new_session, then SIGKILL the rest.
+    
+    Signalling the whole group also takes down any helpers chip-tool forked.
+    The leader isn't reaped until after SIGKILL, so its group id can't have
+    been reused in between.
+    """
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            break
+        if sig == signal.SIGTERM:
+            time.sleep(1)
+    proc.wait()
+
+
+class SessionUnavailable(Exception):
+    """The interactive chip-tool process could not be started"""
+
+
+class ChipToolSession:
+    """Long-lived chip-tool interactive process that runs one command line at a time"""
+
+    def __init__(self, path):
+        self.path = path
+        self.proc = None
+        self.lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        logger.info("Starting interactive chip-tool session")
+        self.proc = subprocess.Popen(
+            [self.path, "interactive", "start"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+        self.read_until_prompt(CHIP_TOOL_TIMEOUT)
+
+    def close(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                # Ask chip-tool to exit cleanly; kill its group if it's stuck
+                try:
+                    self.proc.stdin.write(b"quit\n")
+                    self.proc.stdin.flush()
+                    self.proc.wait(timeout=1)
+                except (OSError, subprocess.TimeoutExpired):
+                    kill_process_group(self.proc)
+            self.proc = None
+
+    def read_until_prompt(self, timeout):
+        """Collect output until chip-tool prints its prompt again"""
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        output = OutputTail()
+        tail = b""
+        while not tail.endswith(INTERACTIVE_PROMPT):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise TimeoutError(f"Command timed out after {timeout} seconds")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("Interactive chip-tool session exited")
+            output.append(chunk)
+            tail = (tail + chunk)[-len(INTERACTIVE_PROMPT):]
+        return output.text()[:-len(INTERACTIVE_PROMPT)]
+
+    def run(self, args):
+        line = " ".join(shlex.quote(arg) for arg in args)
+        with self.lock:
+            # A session that died is respawned on the next command
+            if not self.alive:
+                try:
+                    self.start()
+                except (OSError, TimeoutError, EOFError) as e:
+                    self.close()
+                    raise SessionUnavailable(str(e)) from e
+
+            logger.info(f"Sending to interactive session: {line}")
+            try:
+                self.proc.stdin.write(line.encode() + b"\n")
+                self.proc.stdin.flush()
+                output = self.read_until_prompt(CHIP_TOOL_TIMEOUT)
+            except (OSError, TimeoutError, EOFError) as e:
+                logger.error(f"Interactive command failed: {e}")
+                self.close()
+                return {"success": False, "error": str(e), "command": line}
+
+        # Interactive mode has no per-command exit status, only this log line
+        failed = "Run command failure" in output
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"OUTPUT: {output}")
+        return {
+            "success": not failed,
+            "command": line,
+            "stdout": output,
+            "stderr": "",
+            "returncode": 1 if failed else 0
+        }
+
+
+chip_tool_session = ChipToolSession(CHIP_TOOL_PATH) if CHIP_TOOL_INTERACTIVE else None
 
 
 def run_chip_tool(args):
+    """Run a chip-tool command, through the interactive session when enabled"""
+    if chip_tool_session is not None:
+        try:
+            return chip_tool_session.run(args)
+        except SessionUnavailable as e:
+            logger.warning(f"Interactive session unavailable ({e}), running command directly")
+    return exec_chip_tool(args)
+
+
+def exec_chip_tool(args):
     """Execute chip-tool command with proper error handling"""
     cmd = [CHIP_TOOL_PATH] + args
     logger.info(f"Executing command: {' '.join(cmd)}")
 
     try:
-        result = subprocess.run(
+        with subprocess.Popen(
             cmd,
-            capture_output=True,
-            text=True,
-            timeout=60
-        )
-
-        logger.info(f"Command completed with return code: {result.returncode}")
-        logger.debug(f"STDOUT: {result.stdout}")
-        logger.debug(f"STDERR: {result.stderr}")
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        ) as proc:
+            try:
+                stdout, stderr = read_output(proc, CHIP_TOOL_TIMEOUT)
+            except subprocess.TimeoutExpired as e:
+                logger.error(f"Command timed out: {e}")
+                kill_process_group(proc)
+                return {
+                    "success": False,
+                    "error": f"Command timed out after {CHIP_TOOL_TIMEOUT} seconds",
+                    "command": " ".join(cmd)
+                }
+
+        logger.info(f"Command completed with return code: {proc.returncode}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"STDOUT: {stdout}")
+            logger.debug(f"STDERR: {stderr}")
 
         return {
-            "success": result.returncode == 0,
+            "success": proc.returncode == 0,
             "command": " ".join(cmd),
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode
-        }
-    except subprocess.TimeoutExpired as e:
-        logger.error(f"Command timed out: {e}")
-        return {
-            "success": False,
-            "error": "Command timed out after 60 seconds",
-            "command": " ".join(cmd)
+            "stdout": stdout,
+            "stderr": stderr,
+            "returncode": proc.returncode
         }
     except Exception as e:
         logger.error(f"Command failed with exception: {e}")
@@ -56,23 +294,74 @@ def run_chip_tool(args):
         }
 
 
-@app.route('/bind', methods=['POST'])
-def bind_device():
-    """Create binding between two Matter devices"""
-    data = request.get_json()
-    switch_node = str(data.get('switch_node'))
-    switch_endpoint = str(data.get('switch_endpoint', 1))
-    light_node = str(data.get('light_node'))
-    light_endpoint = str(data.get('light_endpoint', 1))
-
-    if not (switch_node and light_node):
-        return jsonify({"error": "Missing switch_node or light_node"}), 400
-
+def submit_read(args):
+    """Queue a chip-tool read unless an identical one is fresh or already queued"""
+    key = tuple(args)
+    now = time.monotonic()
+    with read_lock:
+        cached = read_cache.get(key)
+        if cached is not None and now - cached[0] < READ_CACHE_TTL:
+            logger.info(f"Serving cached read for: {' '.join(args)}")
+            future = Future()
+            future.set_result(cached[1])
+            return future
+
+        future = read_inflight.get(key)
+        if future is not None:
+            return future
+        future = chip_tool_worker.submit(run_chip_tool, args)
+        read_inflight[key] = future
+
+    # Registered outside the lock: it runs inline if the read already finished
+    future.add_done_callback(lambda done: finish_read(key, done))
+    return future
+
+
+def finish_read(key, future):
+    """Cache a completed read and drop entries that have gone stale"""
+    now = time.monotonic()
+    with read_lock:
+        read_inflight.pop(key, None)
+        for stale in [k for k, (ts, _) in read_cache.items() if now - ts >= READ_CACHE_TTL]:
+            del read_cache[stale]
+        result = future.result()
+        if result.get("success"):
+            read_cache[key] = (now, result)
+
+
+def dispatch(wait, func, *args):
+    """Run func on the chip-tool worker, or queue it if the client asked not to wait"""
+    return respond(wait, chip_tool_worker.submit(func, *args))
+
+
+def respond(wait, future):
+    """Wait for a chip-tool future, or hand back a task id to poll"""
+    # Clients opt out of waiting with "wait": false or RFC 7240's Prefer header
+    respond_async = 'respond-async' in request.headers.get('Prefer', '')
+    if wait and not respond_async:
+        try:
+            return jsonify(future.result(timeout=WAIT_TIMEOUT))
+        except FutureTimeout:
+            # Don't hold the request thread on a hung command; the result
+            # stays reachable through the task path below
+            logger.warning(f"No result after {WAIT_TIMEOUT}s, handing back a task id")
+
+    task_id = uuid.uuid4().hex
+    now = time.monotonic()
+    with tasks_lock:
+        for tid, (submitted_at, queued) in list(tasks.items()):
+            if queued.done() and now - submitted_at > TASK_RETENTION:
+                del tasks[tid]
+        tasks[task_id] = (now, future)
+    logger.info(f"Queued task {task_id}")
+    location = url_for('task_status', task_id=task_id)
+    return jsonify({"task_id": task_id, "status": "queued"}), 202, {"Location": location}
+
+
+def bind(switch_node, switch_endpoint, light_node, light_endpoint):
+    """Write the light's ACL and the switch's binding table"""
     # 1. accesscontrol write acl command
-    acl_json = (
-        '[{"fabricIndex": 1, "privilege": 5, "authMode": 2, "subjects": null, "targets": null}, '
-        f'{{"fabricIndex": 1, "privilege": 3, "authMode": 2, "subjects": [{switch_node}], "targets": null}}]'
-    )
+    acl_json = ACL_TEMPLATE % switch_node
 
     acl_result = run_chip_tool([
         "accesscontrol", "write", "acl",
@@ -81,20 +370,56 @@ def bind_device():
         "0"
     ])
 
-    # 2. binding write binding command
-    binding_json = f'[{{"node":{light_node}, "endpoint":{light_endpoint}, "cluster":6}}]'
-    binding_result = run_chip_tool([
-        "binding", "write", "binding",
-        binding_json,
-        switch_node,
-        switch_endpoint
-    ])
-
-    return jsonify({
+    # 2. binding write binding command; pointless if the light would
+    # reject the switch anyway
+    if not acl_result.get("success"):
+        binding_result = {"success": False, "error": "Skipped because the ACL write failed"}
+    else:
+        binding_json = BINDING_TEMPLATE % (light_node, light_endpoint)
+        binding_result = run_chip_tool([
+            "binding", "write", "binding",
+            binding_json,
+            switch_node,
+            switch_endpoint
+        ])
+
+    return {
         "success": acl_result.get("success") and binding_result.get("success"),
         "acl_command": acl_result,
         "binding_command": binding_result
-    })
+    }
+
+
+@app.after_request
+def compress_response(response):
+    """Gzip larger JSON bodies (chip-tool logs) for clients that accept it"""
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=1))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@app.route('/bind', methods=['POST'])
+def bind_device():
+    """Create binding between two Matter devices"""
+    data = request.get_json()
+    switch_node = str(data.get('switch_node'))
+    switch_endpoint = str(data.get('switch_endpoint', 1))
+    light_node = str(data.get('light_node'))
+    light_endpoint = str(data.get('light_endpoint', 1))
+
+    if not (switch_node and light_node):
+        return jsonify({"error": "Missing switch_node or light_node"}), 400
+
+    return dispatch(data.get('wait', True), bind, switch_node, switch_endpoint, light_node, light_endpoint)
 
 
 @app.route('/pair', methods=['POST'])
@@ -107,46 +432,32 @@ def pair_device():
     if not node_id or not passcode:
         return jsonify({"error": "Missing node_id or passcode"}), 400
 
-    result = run_chip_tool(["pairing", "code", node_id, passcode])
-    return jsonify(result)
-
-
-@app.route('/command', methods=['POST'])
-def run_custom_command():
-    """Execute custom chip-tool command"""
-    data = request.get_json()
-
-    logger.info(f"Received /command request with data: {data}")
+    return dispatch(data.get('wait', True), run_chip_tool, ["pairing", "code", node_id, passcode])
 
-    # Validate request data
-    if not data:
-        logger.error("No JSON data in request")
-        return jsonify({"error": "No JSON data in request body"}), 400
 
-    if 'args' not in data:
-        logger.error("Missing 'args' in request body")
-        return jsonify({"error": "Missing 'args' in request body"}), 400
+class CommandRequest(msgspec.Struct):
+    """Body of /command, type-checked while it is decoded"""
+    args: Annotated[list[str], msgspec.Meta(min_length=1)]
+    wait: bool = True
 
-    args = data['args']
 
-    # Validate args is a list
-    if not isinstance(args, list):
-        logger.error(f"'args' is not a list: {type(args)}")
-        return jsonify({"error": "'args' must be a list of strings"}), 400
+command_decoder = msgspec.json.Decoder(CommandRequest)
 
-    # Validate all args are strings
-    if not all(isinstance(arg, str) for arg in args):
-        logger.error(f"Not all args are strings: {args}")
-        return jsonify({"error": "'args' must be a list of strings"}), 400
 
-    # Validate args is not empty
-    if len(args) == 0:
-        logger.error("'args' list is empty")
-        return jsonify({"error": "'args' list cannot be empty"}), 400
+@app.route('/command', methods=['POST'])
+def run_custom_command():
+    """Execute custom chip-tool command"""
+    try:
+        req = command_decoder.decode(request.get_data())
+    except msgspec.DecodeError as e:
+        logger.error(f"Invalid /command request: {e}")
+        return jsonify({"error": f"Invalid request body: {e}"}), 400
 
+    args = req.args
     logger.info(f"Executing custom command with args: {args}")
-    result = run_chip_tool(args)
-    return jsonify(result)
+    if len(args) > 1 and args[1] in READ_VERBS:
+        return respond(req.wait, submit_read(args))
+    return dispatch(req.wait, run_chip_tool, args)
 
 
 @app.route('/toggle', methods=['POST'])
@@ -159,27 +470,57 @@ def toggle_device():
     if not node_id:
         return jsonify({"error": "Missing node_id"}), 400
 
-    result = run_chip_tool(["onoff", "toggle", node_id, endpoint])
-    return jsonify(result)
+    return dispatch(data.get('wait', True), run_chip_tool, ["onoff", "toggle", node_id, endpoint])
+
+
+@app.route('/task/<task_id>', methods=['GET'])
+def task_status(task_id):
+    """Poll a chip-tool request queued with "wait": false"""
+    with tasks_lock:
+        entry = tasks.get(task_id)
+    if entry is None:
+        return jsonify({"error": f"Unknown task {task_id}"}), 404
+
+    future = entry[1]
+    if not future.done():
+        status = "running" if future.running() else "queued"
+        return jsonify({"task_id": task_id, "status": status})
+    return jsonify({"task_id": task_id, "status": "done", "result": future.result()})
+
+
+# Both possible /health bodies, serialized once
+HEALTH_JSON = {
+    alive: orjson.dumps({
+        "status": "healthy",
+        "service": "chip-tool-api",
+        "interactive_session": alive
+    })
+    for alive in (False, True)
+}
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "service": "chip-tool-api"})
+    alive = chip_tool_session is not None and chip_tool_session.alive
+    return app.response_class(HEALTH_JSON[alive], mimetype="application/json")
 
 
 @app.route('/routes', methods=['GET'])
 def list_routes():
     """List all available routes"""
-    routes = []
-    for rule in app.url_map.iter_rules():
-        routes.append({
-            "endpoint": rule.endpoint,
-            "methods": list(rule.methods),
-            "path": str(rule.rule)
-        })
-    return jsonify({"routes": routes})
+    return app.response_class(ROUTES_JSON, mimetype="application/json")
+
+
+# The route table is fixed once every view above is registered
+ROUTES_JSON = orjson.dumps({"routes": [
+    {
+        "endpoint": rule.endpoint,
+        "methods": list(rule.methods),
+        "path": str(rule.rule)
+    }
+    for rule in app.url_map.iter_rules()
+]})
 
 
 if __name__ == '__main__':
@@ -187,4 +528,6 @@ if __name__ == '__main__':
     logger.info("Available routes:")
     for rule in app.url_map.iter_rules():
         logger.info(f"  {rule.rule} - {list(rule.methods)}")
-    app.run(host="0.0.0.0", port=6000, debug=True)
+    # A single process: the chip-tool worker and task registry live in memory
+    from waitress import serve
+    serve(app, host="0.0.0.0", port=6000, threads=16)
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import aiohttp
+import orjson
 from typing import Dict, Any, Optional
 from logger import logger
 
@@ -22,92 +23,113 @@ class CustomStorageCollector:
         # None until the app has reported at least once.
         self.app_ha_user_id: Optional[str] = None
 
+        # api_key doesn't change after startup, so the headers are built once
+        self._headers = {"Content-Type": "application/json"}
+        if api_key:
+            self._headers["X-API-Key"] = api_key
+
         # Thread/Async lock
         self.lock = asyncio.Lock()
+
+        # One pooled session for every poll, so the keep-alive connection to
+        # Custom Storage is reused instead of reconnecting every 30s.
+        # Created lazily because aiohttp wants a running event loop.
+        self._session: Optional[aiohttp.ClientSession] = None
         
     def get_headers(self) -> Dict[str, str]:
-        """Generate headers, adding X-API-Key if configured."""
-        headers = {"Content-Type": "application/json"}
-        if self.api_key:
-            headers["X-API-Key"] = self.api_key
-        return headers
+        """Request headers, including X-API-Key if configured."""
+        return self._headers
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Returns the shared HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60)
+            )
+        return self._session
+
+    async def close(self):
+        """Closes the shared HTTP session (called on shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     async def fetch_metadata(self) -> bool:
         """Queries Custom Storage API endpoints and refreshes local maps."""
         success = True
         
-        async with aiohttp.ClientSession() as session:
-            # 1. Fetch Home Setup (Floors and Rooms)
-            home_url = f"{self.base_url}/api/data/home_setup"
-            try:
-                async with session.get(home_url, headers=self.get_headers(), timeout=10) as resp:
-                    if resp.status == 200:
-                        body = await resp.json()
-                        if body.get("success"):
-                            val = body.get("value") or body.get("data")
-                            if val is None:
-                                logger.warning(f"Custom Storage API response has success=True but missing both 'value' and 'data' fields: {body}")
-                                success = False
-                            else:
-                                if isinstance(val, str):
-                                    val = json.loads(val)
-                                if isinstance(val, dict):
-                                    await self._parse_home_setup(val)
-                                logger.debug("Successfully updated rooms/floors cache from Custom Storage")
-                        else:
-                            logger.warning(f"Custom Storage API reported error: {body}")
+        session = self._get_session()
+        # 1. Fetch Home Setup (Floors and Rooms)
+        home_url = f"{self.base_url}/api/data/home_setup"
+        try:
+            async with session.get(home_url, headers=self.get_headers(), timeout=10) as resp:
+                if resp.status == 200:
+                    body = await resp.json(loads=orjson.loads)
+                    if body.get("success"):
+                        val = body.get("value") or body.get("data")
+                        if val is None:
+                            logger.warning(f"Custom Storage API response has success=True but missing both 'value' and 'data' fields: {body}")
                             success = False
-                    else:
-                        logger.warning(f"Could not reach {home_url}, status: {resp.status}")
-                        success = False
-            except Exception as e:
-                logger.warning(f"Error connecting to Custom Storage home_setup: {e}")
-                success = False
-
-            # 2. Fetch Device Setup (Snaps and Docks)
-            device_url = f"{self.base_url}/api/data/device_setup"
-            try:
-                async with session.get(device_url, headers=self.get_headers(), timeout=10) as resp:
-                    if resp.status == 200:
-                        body = await resp.json()
-                        if body.get("success"):
-                            val = body.get("value") or body.get("data")
-                            if val is None:
-                                logger.warning(f"Custom Storage API response has success=True but missing both 'value' and 'data' fields: {body}")
-                                success = False
-                            else:
-                                if isinstance(val, str):
-                                    val = json.loads(val)
-                                if isinstance(val, dict):
-                                    await self._parse_device_setup(val)
-                                logger.debug("Successfully updated snaps/docks cache from Custom Storage")
                         else:
-                            logger.warning(f"Custom Storage API reported error: {body}")
-                            success = False
+                            if isinstance(val, str):
+                                val = json.loads(val)
+                            if isinstance(val, dict):
+                                await self._parse_home_setup(val)
+                            logger.debug("Successfully updated rooms/floors cache from Custom Storage")
                     else:
-                        logger.warning(f"Could not reach {device_url}, status: {resp.status}")
+                        logger.warning(f"Custom Storage API reported error: {body}")
                         success = False
-            except Exception as e:
-                logger.warning(f"Error connecting to Custom Storage device_setup: {e}")
-                success = False
+                else:
+                    logger.warning(f"Could not reach {home_url}, status: {resp.status}")
+                    success = False
+        except Exception as e:
+            logger.warning(f"Error connecting to Custom Storage home_setup: {e}")
+            success = False
 
-            # 3. Fetch app identity — the app's self-reported HA user id.
-            # Best-effort and non-fatal: until the app has reported at least
-            # once, this 404s/returns nothing, which is expected, not an
-            # error — app:/ha_ui: classification just stays off until then.
-            identity_url = f"{self.base_url}/api/data/app_identity"
-            try:
-                async with session.get(identity_url, headers=self.get_headers(), timeout=10) as resp:
-                    if resp.status == 200:
-                        body = await resp.json()
-                        if body.get("success"):
-                            val = body.get("value") or body.get("data")
+        # 2. Fetch Device Setup (Snaps and Docks)
+        device_url = f"{self.base_url}/api/data/device_setup"
+        try:
+            async with session.get(device_url, headers=self.get_headers(), timeout=10) as resp:
+                if resp.status == 200:
+                    body = await resp.json(loads=orjson.loads)
+                    if body.get("success"):
+                        val = body.get("value") or body.get("data")
+                        if val is None:
+                            logger.warning(f"Custom Storage API response has success=True but missing both 'value' and 'data' fields: {body}")
+                            success = False
+                        else:
                             if isinstance(val, str):
                                 val = json.loads(val)
                             if isinstance(val, dict):
-                                await self._parse_app_identity(val)
-            except Exception as e:
-                logger.debug(f"No app identity available yet from Custom Storage: {e}")
+                                await self._parse_device_setup(val)
+                            logger.debug("Successfully updated snaps/docks cache from Custom Storage")
+                    else:
+                        logger.warning(f"Custom Storage API reported error: {body}")
+                        success = False
+                else:
+                    logger.warning(f"Could not reach {device_url}, status: {resp.status}")
+                    success = False
+        except Exception as e:
+            logger.warning(f"Error connecting to Custom Storage device_setup: {e}")
+            success = False
+
+        # 3. Fetch app identity — the app's self-reported HA user id.
+        # Best-effort and non-fatal: until the app has reported at least
+        # once, this 404s/returns nothing, which is expected, not an
+        # error — app:/ha_ui: classification just stays off until then.
+        identity_url = f"{self.base_url}/api/data/app_identity"
+        try:
+            async with session.get(identity_url, headers=self.get_headers(), timeout=10) as resp:
+                if resp.status == 200:
+                    body = await resp.json(loads=orjson.loads)
+                    if body.get("success"):
+                        val = body.get("value") or body.get("data")
+                        if isinstance(val, str):
+                            val = json.loads(val)
+                        if isinstance(val, dict):
+                            await self._parse_app_identity(val)
+        except Exception as e:
+            logger.debug(f"No app identity available yet from Custom Storage: {e}")
 
         return success
 
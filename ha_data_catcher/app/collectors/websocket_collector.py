@@ -1,9 +1,16 @@
 import asyncio
 import json
+import orjson
+import random
 import websockets
 from typing import Dict, Any, Optional, Callable
 from logger import logger
 
+# Delay before reconnecting doubles after every attempt that doesn't get
+# authenticated, between these bounds (seconds)
+_RECONNECT_MIN_S = 1.0
+_RECONNECT_MAX_S = 60.0
+
 class HomeAssistantWebsocketCollector:
     """Manages persistent WebSocket connection to Home Assistant Core event stream."""
     
@@ -28,46 +35,50 @@ class HomeAssistantWebsocketCollector:
         return self.msg_id
 
     async def connect_and_listen(self):
-        """Infinite connection loop. Reconnects every 5 seconds on disconnect."""
+        """Infinite connection loop. Reconnects with exponential backoff on disconnect."""
         logger.info(f"Connecting to Home Assistant WebSocket at {self.ws_url}")
         
+        delay = _RECONNECT_MIN_S
         while self._running:
             try:
                 async with websockets.connect(self.ws_url) as websocket:
                     self.is_connected = True
                     # 1. Authenticate
                     auth_ok = await self._authenticate(websocket)
-                    if not auth_ok:
-                        logger.error("Authentication failed. Closing connection.")
-                        self.is_connected = False
-                        await asyncio.sleep(5)
-                        continue
+                    if auth_ok:
+                        logger.info("Successfully authenticated with Home Assistant WebSocket")
+                        delay = _RECONNECT_MIN_S
                         
-                    logger.info("Successfully authenticated with Home Assistant WebSocket")
-                    
-                    # 2. Fetch registries
-                    await self._fetch_ha_registries(websocket)
-                    
-                    # 3. Subscribe to events
-                    await self._subscribe_to_events(websocket)
-                    
-                    # 4. Listen loop
-                    await self._listen_loop(websocket)
+                        # 2. Fetch registries
+                        await self._fetch_ha_registries(websocket)
+                        
+                        # 3. Subscribe to events
+                        await self._subscribe_to_events(websocket)
+                        
+                        # 4. Listen loop
+                        await self._listen_loop(websocket)
+                    else:
+                        # Leaving the block closes the rejected socket before waiting
+                        logger.error("Authentication failed. Closing connection.")
                     
             except (websockets.exceptions.ConnectionClosed, ConnectionRefusedError, OSError) as e:
-                self.is_connected = False
-                logger.warning(f"WebSocket connection lost/failed: {e}. Reconnecting in 5 seconds...")
+                logger.warning(f"WebSocket connection lost/failed: {e}")
             except Exception as e:
-                self.is_connected = False
-                logger.error(f"Unexpected error in WebSocket collector: {e}. Reconnecting in 5 seconds...")
-                
-            await asyncio.sleep(5)
+                logger.error(f"Unexpected error in WebSocket collector: {e}")
+
+            self.is_connected = False
+            if self._running:
+                # Wait between half and all of the current delay
+                wait = random.uniform(delay / 2, delay)
+                logger.warning(f"Reconnecting in {wait:.1f} seconds...")
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, _RECONNECT_MAX_S)
 
     async def _authenticate(self, websocket) -> bool:
         """Handles authentication handshake with HA Core."""
         # Wait for auth_required message
         raw_msg = await websocket.recv()
-        msg = json.loads(raw_msg)
+        msg = orjson.loads(raw_msg)
         if msg.get("type") != "auth_required":
             logger.error(f"Expected auth_required message, got: {msg}")
             return False
@@ -80,7 +91,7 @@ class HomeAssistantWebsocketCollector:
         
         # Wait for auth response
         raw_msg = await websocket.recv()
-        msg = json.loads(raw_msg)
+        msg = orjson.loads(raw_msg)
         if msg.get("type") == "auth_ok":
             return True
         else:
@@ -96,28 +107,28 @@ class HomeAssistantWebsocketCollector:
             floor_id = self.get_next_msg_id()
             await websocket.send(json.dumps({"id": floor_id, "type": "config/floor_registry/list"}))
             floor_resp = await websocket.recv()
-            floors = json.loads(floor_resp).get("result", [])
+            floors = orjson.loads(floor_resp).get("result", [])
             floor_map = {f["floor_id"]: f for f in floors if "floor_id" in f}
             
             # 2. Area Registry
             area_id = self.get_next_msg_id()
             await websocket.send(json.dumps({"id": area_id, "type": "config/area_registry/list"}))
             area_resp = await websocket.recv()
-            areas = json.loads(area_resp).get("result", [])
+            areas = orjson.loads(area_resp).get("result", [])
             area_map = {a["area_id"]: a for a in areas if "area_id" in a}
             
             # 3. Device Registry
             dev_id = self.get_next_msg_id()
             await websocket.send(json.dumps({"id": dev_id, "type": "config/device_registry/list"}))
             dev_resp = await websocket.recv()
-            devices = json.loads(dev_resp).get("result", [])
+            devices = orjson.loads(dev_resp).get("result", [])
             device_map = {d["id"]: d for d in devices if "id" in d}
             
             # 4. Entity Registry
             ent_id = self.get_next_msg_id()
             await websocket.send(json.dumps({"id": ent_id, "type": "config/entity_registry/list"}))
             ent_resp = await websocket.recv()
-            entities = json.loads(ent_resp).get("result", [])
+            entities = orjson.loads(ent_resp).get("result", [])
             entity_map = {e["entity_id"]: e for e in entities if "entity_id" in e}
             
             # Update the event enricher cache
@@ -142,7 +153,7 @@ class HomeAssistantWebsocketCollector:
         
         # Confirm subscription was accepted
         raw_msg = await websocket.recv()
-        msg = json.loads(raw_msg)
+        msg = orjson.loads(raw_msg)
         if msg.get("success") is False:
             logger.error(f"Failed to subscribe to HA events: {msg}")
         else:
@@ -152,7 +163,7 @@ class HomeAssistantWebsocketCollector:
         """Main loop that receives events from the websocket and invokes the callback."""
         while self._running:
             raw_msg = await websocket.recv()
-            msg = json.loads(raw_msg)
+            msg = orjson.loads(raw_msg)
             
             # Event messages have type 'event'
             if msg.get("type") == "event":
@@ -8,6 +8,8 @@ from firebase_admin import credentials, firestore as fs_admin
 
 _MAX_BATCH = 450  # Firestore batch write ceiling is 500 ops
 _CREDENTIALS_PATH = "/firebase-service-account.json"
+_FLUSH_SIZE = 50         # flush as soon as this many events are buffered
+_FLUSH_INTERVAL = 1.0    # otherwise flush this many seconds after the first one
 
 class FirestoreWriter:
     """
@@ -28,6 +30,7 @@ class FirestoreWriter:
         self._buffer: List[Dict[str, Any]] = []
         self._lock = asyncio.Lock()
         self._running = True
+        self._flush_task: Optional[asyncio.Task] = None
         self._init_firebase()
 
     def _init_firebase(self):
@@ -42,13 +45,26 @@ class FirestoreWriter:
             self._db = None
 
     async def write_event(self, event: Dict[str, Any]):
-        """Queues a single event. Flushes immediately (batch_size=1 to match current Sheets behaviour)."""
+        """Queues a single event. Buffered events go out as one batch commit
+        once _FLUSH_SIZE are waiting or _FLUSH_INTERVAL has passed, whichever
+        comes first, so a burst of HA events costs one round-trip, not one each."""
         if self._db is None:
             logger.warning("[Firestore] Client not initialized — event dropped.")
             return
         async with self._lock:
             self._buffer.append(event)
-        asyncio.create_task(self._flush_if_ready())
+            buffered = len(self._buffer)
+        if buffered >= _FLUSH_SIZE:
+            asyncio.create_task(self._flush_if_ready())
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(_FLUSH_INTERVAL)
+        finally:
+            self._flush_task = None
+        await self._flush_if_ready()
 
     async def _flush_if_ready(self):
         async with self._lock:
@@ -86,6 +102,9 @@ class FirestoreWriter:
 
     async def flush(self):
         """Flush any remaining buffered events (called on shutdown)."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
         async with self._lock:
             if not self._buffer:
                 return
@@ -2,6 +2,7 @@ import asyncio
 import signal
 import sys
 import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple
 
 from startup import StartupCoordinator
@@ -13,7 +14,7 @@ from logger import logger
 
 # Fields written to Firestore for every ha_event document.
 # Mirrors the ha_logs.csv contract used in the analytics pipeline.
-_OUTPUT_FIELDS = [
+_OUTPUT_FIELDS = (
     "event_id",
     "timestamp", "date", "time", "hour", "day_of_week",
     "log_source", "actuation_source", "use_case", "ha_event_type",
@@ -28,7 +29,10 @@ _OUTPUT_FIELDS = [
     "thread_node_id",
     "network_type",
     "success", "failure_reason",
-]
+)
+
+# Repeat state changes for the same entity inside this window are dropped
+_DEDUP_WINDOW_S = 0.5
 
 
 class DataCollectorApplication:
@@ -44,8 +48,10 @@ class DataCollectorApplication:
         self.parser = None
         self.enricher = None
 
-        # Deduplication cache: entity_id -> (state, timestamp)
-        self.last_state_cache: Dict[str, Tuple[str, float]] = {}
+        # Deduplication cache: entity_id -> (state, timestamp), oldest first.
+        # Entries past the dedup window can never match again, so they are
+        # popped off the front as new events arrive.
+        self.last_state_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
 
         self.tasks = []
         self.loop = None
@@ -92,7 +98,7 @@ class DataCollectorApplication:
 
             # 1. Evaluate filter rules
             if should_filter_event(event_type, entity_id):
-                logger.debug(f"[App] Filtered out noisy event: {event_type} (entity: {entity_id})")
+                logger.debug("[App] Filtered out noisy event: %s (entity: %s)", event_type, entity_id)
                 return
 
             # Deduplicate state changes within 500ms to avoid bounce transitions
@@ -100,15 +106,20 @@ class DataCollectorApplication:
                 new_state = event_data.get("new_state", {})
                 new_val = new_state.get("state") if new_state else None
                 if new_val:
-                    curr_time = time.time()
-                    if entity_id in self.last_state_cache:
-                        last_val, last_time = self.last_state_cache[entity_id]
-                        if last_val == new_val and (curr_time - last_time < 0.5):
-                            logger.debug(f"[App] Deduplicated rapid repeat state change for {entity_id} to '{new_val}'")
-                            return
-                    self.last_state_cache[entity_id] = (new_val, curr_time)
-
-            logger.debug(f"[App] Processing event: {event_type} (entity: {entity_id})")
+                    curr_time = time.monotonic()
+                    cache = self.last_state_cache
+                    cutoff = curr_time - _DEDUP_WINDOW_S
+                    while cache and next(iter(cache.values()))[1] <= cutoff:
+                        cache.popitem(last=False)
+                    last = cache.get(entity_id)
+                    if last is not None and last[0] == new_val and last[1] > cutoff:
+                        logger.debug("[App] Deduplicated rapid repeat state change for %s to '%s'", entity_id, new_val)
+                        return
+                    # Re-insert so the entry moves to the back with its new time
+                    cache.pop(entity_id, None)
+                    cache[entity_id] = (new_val, curr_time)
+
+            logger.debug("[App] Processing event: %s (entity: %s)", event_type, entity_id)
 
             # 2. Parse raw event
             parsed = self.parser.parse_event(raw_event)
@@ -135,13 +146,14 @@ class DataCollectorApplication:
             # Enrich with Custom Storage + HA registry data
             enriched = self.enricher.enrich_event(parsed_event, custom_metadata)
 
-            # Build the Firestore document from the canonical output fields
-            doc = {"hub_id": self.coordinator.hub_id}
-            doc.update({field: enriched.get(field) for field in _OUTPUT_FIELDS})
-
-            # Remove None values so Firestore doesn't store explicit nulls for
+            # Build the Firestore document from the canonical output fields,
+            # skipping None values so Firestore doesn't store explicit nulls for
             # optional fields — keeps documents lean and matches app_events style.
-            doc = {k: v for k, v in doc.items() if v is not None}
+            doc = {"hub_id": self.coordinator.hub_id}
+            for field in _OUTPUT_FIELDS:
+                value = enriched.get(field)
+                if value is not None:
+                    doc[field] = value
 
             await self.firestore_writer.write_event(doc)
 
@@ -193,6 +205,9 @@ class DataCollectorApplication:
             logger.info("[App] Flushing remaining Firestore event buffer before exiting...")
             await self.firestore_writer.flush()
 
+        if self.custom_storage_collector:
+            await self.custom_storage_collector.close()
+
         logger.info("[App] Cleanup completed. Exiting.")
         sys.exit(0)
 
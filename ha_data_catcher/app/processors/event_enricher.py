@@ -1,7 +1,26 @@
 import json
+import re
 from collections import OrderedDict
 from typing import Dict, Any, Optional, Tuple
 from logger import logger
+from processors.metrics_fields import MetricsFieldsExtractor
+
+# Trailing digits of a Matter node id, used by _match_matter_node_id
+_NUMERIC_SUFFIX = re.compile(r'(\d+)\s*$')
+
+# Device type reported for an entity that no snap/dock claimed, by HA domain.
+# Domains not listed here fall back to the capitalised domain name.
+_DOMAIN_DEVICE_TYPES = {
+    "light": "Light",
+    "fan": "Fan",
+    "switch": "Switch",
+    "cover": "Cover",
+    "lock": "Lock",
+    "climate": "Climate",
+    "media_player": "Media Player",
+    "automation": "Automation",
+    "scene": "Scene",
+}
 
 class EventEnricher:
     """Enriches baseline parsed events with Custom Storage metadata and HA registry mappings."""
@@ -18,6 +37,9 @@ class EventEnricher:
         self.ha_area_registry: Dict[str, Dict[str, Any]] = {}
         self.ha_floor_registry: Dict[str, Dict[str, Any]] = {}
 
+        # Stateless, so one instance serves every event
+        self.metrics_extractor = MetricsFieldsExtractor()
+
         # Cache for last command timestamps per entity to calculate latencies
         self.last_command_ts_cache: Dict[str, str] = {}
 
@@ -73,7 +95,7 @@ class EventEnricher:
         identifiers = device_info.get("identifiers", [])
         for id_type, id_val in identifiers:
             if id_type == "matter":
-                logger.debug(f"Resolved Matter Node ID '{id_val}' for device '{device_id}'")
+                logger.debug("Resolved Matter Node ID '%s' for device '%s'", id_val, device_id)
                 return str(id_val)
         return None
 
@@ -88,9 +110,8 @@ class EventEnricher:
             return True
             
         # Extract numeric suffixes (e.g. "3" from "1-3" or "matter_node_3")
-        import re
         def get_numeric_suffix(s: str) -> Optional[str]:
-            match = re.search(r'(\d+)\s*$', s)
+            match = _NUMERIC_SUFFIX.search(s)
             return match.group(1) if match else None
             
         ha_num = get_numeric_suffix(ha_node_str)
@@ -308,11 +329,8 @@ class EventEnricher:
                 docklets = d_data.get("docklets", {})
                 if isinstance(docklets, dict):
                     for docklet_id, docklet_data in docklets.items():
-                        if docklet_data.get("entity_id") == entity_id:
-                            dock_match = (d_id, d_data)
-                            matched_docklet = docklet_data
-                            break
-                        if docklet_data.get("bound_device_entity_id") == entity_id:
+                        # Either the slot itself or the device bound to it
+                        if entity_id in (docklet_data.get("entity_id"), docklet_data.get("bound_device_entity_id")):
                             dock_match = (d_id, d_data)
                             matched_docklet = docklet_data
                             break
@@ -387,26 +405,7 @@ class EventEnricher:
         # Fallback to domain classification for Device Type
         if (not device_type or device_type == "not_mapped") and entity_id:
             domain = enriched.get("domain")
-            if domain == "light":
-                device_type = "Light"
-            elif domain == "fan":
-                device_type = "Fan"
-            elif domain == "switch":
-                device_type = "Switch"
-            elif domain == "cover":
-                device_type = "Cover"
-            elif domain == "lock":
-                device_type = "Lock"
-            elif domain == "climate":
-                device_type = "Climate"
-            elif domain == "media_player":
-                device_type = "Media Player"
-            elif domain == "automation":
-                device_type = "Automation"
-            elif domain == "scene":
-                device_type = "Scene"
-            else:
-                device_type = domain.capitalize() if domain else "Unknown"
+            device_type = _DOMAIN_DEVICE_TYPES.get(domain) or (domain.capitalize() if domain else "Unknown")
 
         # Apply fallback overrides
         enriched.update({
@@ -417,10 +416,7 @@ class EventEnricher:
         })
 
         # 5. Extract Timing Metric Indicators (from metrics_fields)
-        # Import dynamically to avoid circular dependencies
-        from processors.metrics_fields import MetricsFieldsExtractor
-        metrics_extractor = MetricsFieldsExtractor()
-        metrics = metrics_extractor.extract_metrics(
+        metrics = self.metrics_extractor.extract_metrics(
             event_type=enriched["ha_event_type"],
             parsed_event=enriched,
             is_snap=is_snap,
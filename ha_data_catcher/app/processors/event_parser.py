@@ -1,10 +1,15 @@
-import json
 import uuid
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, Tuple
 from zoneinfo import ZoneInfo
 from logger import logger
 
+# datetime.weekday() -> name, instead of a locale-aware strftime("%A") per event
+DAY_NAMES = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+# States treated as "off" when classifying a state_changed as turn_on/turn_off
+OFF_STATES = frozenset({"off", "unavailable", "unknown"})
+
 def extract_color(data_dict: Dict[str, Any]) -> Optional[str]:
     if "color_name" in data_dict:
         return str(data_dict["color_name"])
@@ -37,6 +42,20 @@ def extract_color(data_dict: Dict[str, Any]) -> Optional[str]:
             pass
     return None
 
+def extract_brightness(data_dict: Dict[str, Any]) -> Optional[int]:
+    """Returns brightness as a 0-100 percentage from a raw 0-255 or a pct field."""
+    if "brightness" in data_dict:
+        try:
+            return int(round((float(data_dict["brightness"]) / 255.0) * 100.0))
+        except (ValueError, TypeError):
+            return None
+    if "brightness_pct" in data_dict:
+        try:
+            return int(round(float(data_dict["brightness_pct"])))
+        except (ValueError, TypeError):
+            return None
+    return None
+
 def extract_fan_speed(data_dict: Dict[str, Any]) -> Optional[str]:
     if "percentage" in data_dict:
         try:
@@ -119,17 +138,8 @@ class EventParser:
             friendly_name = attributes.get("friendly_name")
             
             # Extract brightness (percentage 0-100)
-            if "brightness" in attributes:
-                try:
-                    raw_brightness = float(attributes["brightness"])
-                    brightness = int(round((raw_brightness / 255.0) * 100.0))
-                except (ValueError, TypeError):
-                    pass
-            elif "brightness_pct" in attributes:
-                try:
-                    brightness = int(round(float(attributes["brightness_pct"])))
-                except (ValueError, TypeError):
-                    pass
+            if "brightness" in attributes or "brightness_pct" in attributes:
+                brightness = extract_brightness(attributes)
             elif entity_id and entity_id.startswith("number.") and ("level" in entity_id or "brightness" in entity_id) and new_state:
                 try:
                     max_val = float(attributes.get("max", 100.0))
@@ -155,9 +165,11 @@ class EventParser:
             if attr_action:
                 action = attr_action
             elif old_state != new_state:
-                if old_state in ("off", "unavailable", "unknown") and new_state not in ("off", "unavailable", "unknown"):
+                was_off = old_state in OFF_STATES
+                is_off = new_state in OFF_STATES
+                if was_off and not is_off:
                     action = "turn_on"
-                elif old_state not in ("off", "unavailable", "unknown") and new_state in ("off", "unavailable", "unknown"):
+                elif is_off and not was_off:
                     action = "turn_off"
                 else:
                     action = "state_transition"
@@ -186,17 +198,7 @@ class EventParser:
                     break
                     
             # Extract brightness from service call
-            if "brightness" in service_data:
-                try:
-                    raw_brightness = float(service_data["brightness"])
-                    brightness = int(round((raw_brightness / 255.0) * 100.0))
-                except (ValueError, TypeError):
-                    pass
-            elif "brightness_pct" in service_data:
-                try:
-                    brightness = int(round(float(service_data["brightness_pct"])))
-                except (ValueError, TypeError):
-                    pass
+            brightness = extract_brightness(service_data)
             
             # Extract fan speed from service call
             fan_speed = extract_fan_speed(service_data)
@@ -229,10 +231,13 @@ class EventParser:
         return {
             "event_id": event_id,
             "timestamp": dt_local.isoformat(),
-            "date": dt_local.strftime("%Y-%m-%d"),
-            "time": dt_local.strftime("%H:%M:%S"),
+            # Epoch seconds of the same instant, so latency maths downstream
+            # doesn't have to parse "timestamp" back into a datetime
+            "timestamp_epoch": dt_local.timestamp(),
+            "date": dt_local.date().isoformat(),
+            "time": dt_local.time().isoformat(timespec="seconds"),
             "hour": dt_local.hour,
-            "day_of_week": dt_local.strftime("%A"),
+            "day_of_week": DAY_NAMES[dt_local.weekday()],
             "ha_event_type": event_type,
             "entity_id": entity_id,
             "domain": domain,
@@ -246,7 +251,7 @@ class EventParser:
             "origin": origin,
             "context_id": context_id,
             "context_user_id": context_user_id,
-            "attributes": json.dumps(attributes) if attributes else None,
-            "raw_event_json": json.dumps(raw_event),
+            # Kept as the dict HA sent; nothing downstream needs it as JSON
+            "attributes": attributes or None,
             "device_id": device_id
         }
@@ -1,7 +1,8 @@
+from functools import lru_cache
 from typing import Dict, Any, Optional
 
 # Configurable lists for filtering noisy telemetry
-IGNORED_ENTITY_PREFIXES = [
+IGNORED_ENTITY_PREFIXES = (
     "sensor.router_",
     "sensor.network_",
     "sensor.wifi_",
@@ -14,26 +15,26 @@ IGNORED_ENTITY_PREFIXES = [
     "binary_sensor.network_",
     "binary_sensor.wifi_",
     "sensor.archer_"
-]
+)
 
-IGNORED_DOMAINS = [
+IGNORED_DOMAINS = frozenset({
     "device_tracker",
     "upnp",
     "sun",
     "zone",
     "weather"
-]
+})
 
-IGNORED_EVENT_TYPES = [
+IGNORED_EVENT_TYPES = frozenset({
     "time_changed",
     "themes_updated",
     "component_loaded",
     "core_config_updated",
     "recorder_5min_statistics_generated",
     "recorder_hourly_statistics_generated"
-]
+})
 
-KEEP_DOMAINS = [
+KEEP_DOMAINS = frozenset({
     "light",
     "fan",
     "switch",
@@ -43,7 +44,10 @@ KEEP_DOMAINS = [
     "media_player",
     "automation",
     "scene"
-]
+})
+
+# Substrings marking general diagnostics, wifi, or router entities
+IGNORED_ENTITY_KEYWORDS = ("wifi", "ping", "bandwidth", "uptime", "archer", "battery", "charger", "sun")
 
 def should_filter_event(event_type: str, entity_id: Optional[str] = None) -> bool:
     """
@@ -59,7 +63,13 @@ def should_filter_event(event_type: str, entity_id: Optional[str] = None) -> boo
         
     if not entity_id:
         return False
-        
+
+    return _should_filter_entity(entity_id)
+
+# The entity rules depend on nothing but entity_id, and a home has a fixed,
+# small set of entities, so each one is evaluated once and then looked up.
+@lru_cache(maxsize=4096)
+def _should_filter_entity(entity_id: str) -> bool:
     entity_id_lower = entity_id.lower()
     
     # Keep ALL dock binding actions, snap switches, and associated remote logs
@@ -67,27 +77,23 @@ def should_filter_event(event_type: str, entity_id: Optional[str] = None) -> boo
         return False
 
     # 2. Extract domain
-    domain = entity_id.split(".")[0] if "." in entity_id else ""
+    domain = entity_id.partition(".")[0] if "." in entity_id else ""
     
     # 3. Always keep check (takes precedence over ignored domains)
     if domain in KEEP_DOMAINS:
         # Still check if it starts with ignored prefixes (e.g. sensor.router_light)
-        for prefix in IGNORED_ENTITY_PREFIXES:
-            if entity_id.startswith(prefix):
-                return True
-        return False
+        return entity_id.startswith(IGNORED_ENTITY_PREFIXES)
         
     # 4. Filter by ignored domains
     if domain in IGNORED_DOMAINS:
         return True
         
     # 5. Filter by entity prefixes
-    for prefix in IGNORED_ENTITY_PREFIXES:
-        if entity_id.startswith(prefix):
-            return True
-            
+    if entity_id.startswith(IGNORED_ENTITY_PREFIXES):
+        return True
+
     # Check for general diagnostics, wifi, or router entities
-    if any(keyword in entity_id_lower for keyword in ["wifi", "ping", "bandwidth", "uptime", "archer", "battery", "charger", "sun"]):
+    if any(keyword in entity_id_lower for keyword in IGNORED_ENTITY_KEYWORDS):
         return True
         
     return False
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 from zoneinfo import ZoneInfo
@@ -61,7 +62,12 @@ class MetricsFieldsExtractor:
 
         # ha_processing_latency_ms: time from event firing to processing by data catcher (hub -> app latency)
         ha_processing_latency_ms: Optional[int] = None
-        if timestamp:
+        timestamp_epoch = parsed_event.get("timestamp_epoch")
+        if timestamp_epoch is not None:
+            delta_ms = int((time.time() - timestamp_epoch) * 1000)
+            if delta_ms >= 0:
+                ha_processing_latency_ms = delta_ms
+        elif timestamp:
             try:
                 t_event = datetime.fromisoformat(timestamp)
                 t_now = datetime.now(t_event.tzinfo)
@@ -32,7 +32,11 @@ class StartupCoordinator:
             logger.debug("[Startup] Debug logging enabled")
 
         # 2. Query Supervisor for Core details
-        ha_details = self.supervisor_client.get_ha_details(self.config_manager.ha_token)
+        # The Supervisor client is blocking (requests); run it off the event loop
+        loop = asyncio.get_running_loop()
+        ha_details = await loop.run_in_executor(
+            None, self.supervisor_client.get_ha_details, self.config_manager.ha_token
+        )
         self.ha_ip = ha_details["ha_ip"]
         self.ha_port = ha_details["ha_port"]
         self.ha_ws_url = ha_details["ws_url"]
@@ -49,11 +53,13 @@ class StartupCoordinator:
             logger.info(f"[Startup] Hub ID (Explicitly Configured): {self.hub_id}")
         else:
             logger.info("[Startup] Hub ID not configured. Querying auto-discovery...")
-            self.hub_id = self.supervisor_client.discover_hub_id(self.config_manager.custom_storage_url)
+            self.hub_id = await loop.run_in_executor(
+                None, self.supervisor_client.discover_hub_id, self.config_manager.custom_storage_url
+            )
             logger.info(f"[Startup] Hub ID (Auto-Discovered): {self.hub_id}")
             
         # 4. Determine Timezone
-        self.ha_timezone = self.supervisor_client.get_ha_timezone()
+        self.ha_timezone = await loop.run_in_executor(None, self.supervisor_client.get_ha_timezone)
         logger.info(f"[Startup] Timezone: {self.ha_timezone}")
         
         logger.info("[Startup] Discovery sequence complete.")
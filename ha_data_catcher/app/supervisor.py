@@ -11,6 +11,14 @@ class SupervisorClient:
         self.api_url = os.getenv("SUPERVISOR_API", "http://supervisor")
         self.token = os.getenv("SUPERVISOR_TOKEN", "")
         self.is_supervisor = bool(self.token)
+        # Discovery makes several calls to the same Supervisor host back to
+        # back; a session keeps one connection open across them
+        self._session = requests.Session()
+        # The token is fixed for the add-on's lifetime, so build headers once
+        self._headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
         
         if self.is_supervisor:
             logger.info("Running in Home Assistant Supervisor environment")
@@ -18,11 +26,8 @@ class SupervisorClient:
             logger.warning("Supervisor token not found. Running in standalone/local mode")
 
     def get_headers(self) -> Dict[str, str]:
-        """Generate Authorization headers for Supervisor API requests."""
-        return {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
+        """Authorization headers for Supervisor API requests."""
+        return self._headers
 
     def get_ha_details(self, fallback_token: str = "") -> Dict[str, Any]:
         """Discovers the IP, Port, and WebSocket URI of HA Core."""
@@ -37,7 +42,7 @@ class SupervisorClient:
             # Inside supervisor network, we query /core/info
             try:
                 url = f"{self.api_url}/core/info"
-                response = requests.get(url, headers=self.get_headers(), timeout=5)
+                response = self._session.get(url, headers=self.get_headers(), timeout=5)
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     port = data.get("port", 8123)
@@ -69,7 +74,7 @@ class SupervisorClient:
         if self.is_supervisor:
             try:
                 url = f"{self.api_url}/network/info"
-                response = requests.get(url, headers=self.get_headers(), timeout=5)
+                response = self._session.get(url, headers=self.get_headers(), timeout=5)
                 if response.status_code == 200:
                     interfaces = response.json().get("data", {}).get("interfaces", [])
                     for interface in interfaces:
@@ -102,7 +107,7 @@ class SupervisorClient:
             if api_key:
                 headers["X-API-Key"] = api_key
                 
-            response = requests.get(url, headers=headers, timeout=5)
+            response = self._session.get(url, headers=headers, timeout=5)
             if response.status_code == 200:
                 body = response.json()
                 if body.get("success"):
@@ -121,7 +126,7 @@ class SupervisorClient:
         if self.is_supervisor:
             try:
                 url = f"{self.api_url}/host/info"
-                response = requests.get(url, headers=self.get_headers(), timeout=5)
+                response = self._session.get(url, headers=self.get_headers(), timeout=5)
                 if response.status_code == 200:
                     data = response.json().get("data", {})
                     hostname = data.get("hostname", "")
@@ -159,7 +164,7 @@ class SupervisorClient:
         try:
             # We can query HA REST API config via supervisor proxy
             url = f"{self.api_url}/core/api/config"
-            response = requests.get(url, headers=self.get_headers(), timeout=5)
+            response = self._session.get(url, headers=self.get_headers(), timeout=5)
             if response.status_code == 200:
                 tz = response.json().get("time_zone", fallback)
                 if tz == "UTC":
@@ -9,6 +9,8 @@ Enhanced Button Monitor for Wi-Fi Onboarding Add-on
 - LED status integration
 """
 
+import argparse
+import importlib.util
 import time
 import subprocess
 import sys
@@ -16,10 +18,46 @@ import os
 import json
 import signal
 import logging
+import select
+import selectors
 import threading
-from pathlib import Path
 from contextlib import contextmanager
 
+try:
+    import lgpio
+    _HAS_LGPIO = True
+except ImportError:
+    lgpio = None
+    _HAS_LGPIO = False
+
+# gpiozero reads its pin factory at first use, but set it before the import
+# so every code path sees the same factory as the LED controller
+os.environ['GPIOZERO_PIN_FACTORY'] = 'native'
+try:
+    from gpiozero import Button
+except ImportError:
+    Button = None
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
+# Manual wlan0 reset when pyroute2 is unavailable, run as one shell so the steps don't each pay a fork/exec.
+# Routes are listed for wlan0 only and deleted with "dev wlan0" so routes on
+# other interfaces (e.g. the ethernet default route) are never touched.
+WLAN0_RESET_SCRIPT = (
+    "ip link set wlan0 down; "
+    "ip addr flush dev wlan0; "
+    "ip -o route show dev wlan0 | while read -r route; do ip route del $route dev wlan0; done; "
+    "ip link set wlan0 up"
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,6 +68,31 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Sibling modules (firestore_helper, supervisor_api, ...) live next to this script
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Transient WiFi files cleared on reset, alongside the instance's config/state files
+_WIFI_TMP_FILES = ("/tmp/wifi_onboarding.lock", "/tmp/wpa_supplicant.conf")
+
+# Process names (comm or script basename) of the BLE onboarding service
+_BLE_SERVICE_NAMES = frozenset({"improved_ble_service.py"})
+
+# gpiochip numbers to probe: 0 on older Pis, 4 and 10-13 on RPi 5
+_GPIO_CHIPS = (0, 4, 10, 11, 12, 13)
+
+# Last gpiochip/pin that worked, tried first so restarts skip the chip probe
+_CHIP_CACHE = "/tmp/button_chip.json"
+
+# Device nodes reported by diagnose_gpio_access
+_GPIO_DEVS = ("/dev/gpiomem",) + tuple(f"/dev/gpiochip{n}" for n in _GPIO_CHIPS) + ("/dev/mem",)
+
+def _module_available(name: str) -> bool:
+    """Check whether a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
 def set_led_status(status: str):
     """Helper function to control the LED by writing to a status file."""
     try:
@@ -40,8 +103,10 @@ def set_led_status(status: str):
         logger.error(f"Failed to write LED status: {e}")
 
 class ButtonMonitor:
-    def __init__(self, gpio_pin=17, hold_time=5, debounce_time=0.05):
+    def __init__(self, gpio_pin=17, hold_time=5, debounce_time=0.05, try_fallback_pins=False):
         self.gpio_pin = gpio_pin
+        self.try_fallback_pins = try_fallback_pins
+        self._sysfs_gpio_dir = f"/sys/class/gpio/gpio{gpio_pin}"
         self.hold_time = hold_time
         self.debounce_time = debounce_time
         self.running = True
@@ -53,12 +118,37 @@ class ButtonMonitor:
         self.last_press_time = 0
         self.press_start_time = 0
         self.is_pressed_state = False
-        self.monitor_thread = None
+        # Set from GPIO edge callbacks so the monitor thread can block
+        # instead of polling the pin every second
+        self._press_event = threading.Event()
+        self._release_event = threading.Event()
+        self._edge_driven = False
+        # Kernel edge timestamps (ns) from lgpio alerts: press edge, and the
+        # press duration once the matching release edge arrives
+        self._press_ns = None
+        self._held_ns = None
+        # Self-pipe that wakes fd-based waits (inotify) on shutdown
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        # Pin reader chosen once at setup time (see _try_gpio_setup)
+        self._read_impl = self._read_none
+        # (timestamp, info) from the last get_system_info call
+        self._sysinfo_cache = (0.0, None)
+
+    def run_command(self, cmd, timeout=10, capture_output=True):
+        """Run shell command safely
 
-    def run_command(self, cmd, timeout=10):
-        """Run shell command safely"""
+        Commands whose output is not needed (capture_output=False) go through
+        posix_spawn, which skips copying the interpreter's page tables on fork.
+        """
+        if not capture_output:
+            returncode = self._spawn_wait(cmd, timeout=timeout)
+            if returncode is None:
+                return None
+            return subprocess.CompletedProcess(cmd, returncode)
         try:
-            logger.debug(f"Running command: {' '.join(cmd)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Running command: %s", ' '.join(cmd))
             result = subprocess.run(cmd, timeout=timeout, capture_output=True, text=True)
             return result
         except subprocess.TimeoutExpired:
@@ -68,22 +158,123 @@ class ButtonMonitor:
             logger.error(f"Command execution failed: {e}")
             return None
 
+    def _spawn_wait(self, cmd, timeout=10):
+        """Spawn cmd with posix_spawnp, discard its output and wait for it.
+
+        Returns the exit code, or None if the command could not be started or
+        timed out (in which case it is killed).
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Spawning command: %s", ' '.join(cmd))
+        try:
+            # Match subprocess' restore_signals (the interpreter ignores SIGPIPE
+            # and SIGXFSZ) and start with an empty mask, whichever thread spawns
+            pid = os.posix_spawnp(cmd[0], cmd, os.environ, file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            ], setsigdef=(signal.SIGPIPE, signal.SIGXFSZ), setsigmask=())
+        except OSError as e:
+            logger.error(f"Command execution failed: {e}")
+            return None
+
+        # A pidfd becomes readable when the child exits; unlike an itimer this
+        # works from the monitor thread, not just the main thread
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError as e:
+            # No pidfd (old kernel, seccomp, out of fds): poll for the exit
+            # instead, so the child is still reaped and the timeout still holds
+            logger.debug("pidfd_open failed (%s), polling for pid %d", e, pid)
+            deadline = time.monotonic() + timeout
+            while True:
+                reaped, status = os.waitpid(pid, os.WNOHANG)
+                if reaped:
+                    return os.waitstatus_to_exitcode(status)
+                if time.monotonic() >= deadline:
+                    break
+                time.sleep(0.05)
+            ready = False
+        else:
+            try:
+                ready, _, _ = select.select([pidfd], [], [], timeout)
+            finally:
+                os.close(pidfd)
+
+        if not ready:
+            logger.error(f"Command timed out: {' '.join(cmd)}")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status)
+
+    def _find_pids(self, names):
+        """Return the pids of processes whose comm or an argv basename is one of names.
+
+        One in-process pass over /proc replaces forking pkill per name. Matching
+        is by exact set lookup rather than pkill -f's substring search, so e.g.
+        a `tail improved_ble_service.py.log` is left alone.
+        """
+        names = frozenset(names)
+        own_pid = os.getpid()
+        pids = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            if pid == own_pid:
+                continue
+            try:
+                with open(f'/proc/{entry}/comm') as f:
+                    comm = f.read().rstrip('\n')
+                if comm not in names:
+                    # Interpreted scripts show up as python3; match the script
+                    # path in argv instead
+                    with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                        argv = f.read().decode(errors='replace').split('\0')
+                    if names.isdisjoint(os.path.basename(arg) for arg in argv):
+                        continue
+            except OSError:
+                # Process exited mid-scan
+                continue
+            pids.append(pid)
+        return pids
+
+    def _signal_pids(self, pids, sig):
+        """Send sig to each pid, returning how many were signaled"""
+        signaled = 0
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+                signaled += 1
+            except (ProcessLookupError, PermissionError):
+                # Exited since the scan, or not ours to signal
+                continue
+        return signaled
+
     def setup_gpio(self):
         """Initialize GPIO with multiple fallback methods using proven working approach"""
         logger.info(f"Initializing GPIO pin {self.gpio_pin} (Pi 5 compatible)")
         
-        # Try both the configured pin and common button pins as fallback
+        # The configured pin is authoritative; common button pins are only
+        # tried as a fallback when asked for (--try-fallback-pins)
         pins_to_try = [self.gpio_pin]
-        if self.gpio_pin != 17:
-            pins_to_try.append(17)
-        if self.gpio_pin != 11:
-            pins_to_try.append(11)
+        if self.try_fallback_pins:
+            pins_to_try += [pin for pin in (17, 11) if pin != self.gpio_pin]
+
+        # Start with the pin that worked last time
+        cached = self._load_chip_cache()
+        if cached and cached[1] in pins_to_try:
+            pins_to_try.remove(cached[1])
+            pins_to_try.insert(0, cached[1])
             
         original_pin = self.gpio_pin
         
         for pin_to_try in pins_to_try:
             self.gpio_pin = pin_to_try
-            logger.debug(f"Trying GPIO pin {pin_to_try}")
+            logger.debug("Trying GPIO pin %s", pin_to_try)
             
             if self._try_gpio_setup():
                 if pin_to_try != original_pin:
@@ -95,23 +286,52 @@ class ButtonMonitor:
         logger.error("No working GPIO library found")
         return False
     
+    def _load_chip_cache(self):
+        """Return the cached (chip_num, pin) from a previous run, or None"""
+        try:
+            with open(_CHIP_CACHE) as f:
+                cached = json.load(f)
+            return int(cached["chip_num"]), int(cached["pin"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_chip_cache(self, chip_num, pin):
+        """Atomically record the chip/pin pair that worked"""
+        tmp_path = f"{_CHIP_CACHE}.{os.getpid()}"
+        data = json.dumps({"chip_num": chip_num, "pin": pin}).encode()
+        try:
+            # A few bytes on tmpfs: one write on a raw fd, no buffered file object
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, _CHIP_CACHE)
+        except OSError as e:
+            logger.debug("Could not write chip cache: %s", e)
+
     def _try_gpio_setup(self):
         """Try GPIO setup using EXACT same approach as working LED/GPIO tests"""
         logger.info(f"🔘 BUTTON SETUP: Using same approach as working LED tests")
         logger.info(f"Initializing GPIO pin {self.gpio_pin}")
         
         # Debug information
-        import sys
         logger.info(f"Python executable: {sys.executable}")
         logger.info(f"Python version: {sys.version}")
 
         # Method 1: Use EXACT same lgpio approach as working LED tests
         try:
-            import lgpio
+            if not _HAS_LGPIO:
+                raise ImportError("No module named 'lgpio'")
             logger.info("✅ lgpio import successful")
             
-            # Try multiple gpiochips (RPi 5 exposes different chips)
-            chips_to_try = [0, 4, 10, 11, 12, 13]
+            # Try multiple gpiochips (RPi 5 exposes different chips), starting
+            # with the one cached for this pin by a previous run
+            chips_to_try = _GPIO_CHIPS
+            cached = self._load_chip_cache()
+            cached_chip = cached[0] if cached and cached[1] == self.gpio_pin else None
+            if cached_chip is not None:
+                chips_to_try = (cached_chip,) + tuple(c for c in _GPIO_CHIPS if c != cached_chip)
             last_err = None
             for chip_num in chips_to_try:
                 try:
@@ -148,11 +368,35 @@ class ButtonMonitor:
                     
                     self.button_obj = {'chip': chip, 'pin': self.gpio_pin, 'type': 'lgpio_simple', 'chip_num': chip_num}
                     self.gpio_lib = "lgpio"
+                    gpio_read, pin = lgpio.gpio_read, self.gpio_pin
+                    # Active low with pull-up: 0 = pressed, 1 = released
+                    self._read_impl = lambda: gpio_read(chip, pin) == 0
+
+                    # Prefer kernel edge alerts over polling; fall back to polling if unsupported
+                    try:
+                        lgpio.gpio_claim_alert(chip, self.gpio_pin, lgpio.BOTH_EDGES, lgpio.SET_PULL_UP)
+                        # Filter contact bounce in the kernel rather than in Python
+                        try:
+                            lgpio.gpio_set_debounce_micros(chip, self.gpio_pin, int(self.debounce_time * 1_000_000))
+                        except Exception as e:
+                            logger.debug("Kernel debounce unavailable: %s", e)
+                        self.button_obj['callback'] = lgpio.callback(chip, self.gpio_pin, lgpio.BOTH_EDGES, self._edge_cb)
+                        self._edge_driven = True
+                        logger.info(f"✅ GPIO {self.gpio_pin} edge alerts enabled on chip {chip_num}")
+                    except Exception as e:
+                        self._edge_driven = False
+                        logger.warning(f"⚠️  Edge alerts unavailable ({e}) - falling back to polling")
+                        try:
+                            lgpio.gpio_claim_input(chip, self.gpio_pin, lgpio.SET_PULL_UP)
+                        except Exception:
+                            pass
+                    if chip_num != cached_chip:
+                        self._save_chip_cache(chip_num, self.gpio_pin)
                     logger.info("🎉 SUCCESS: Button using lgpio (same as working LEDs)")
                     return True
                 except Exception as e:
                     last_err = e
-                    logger.debug(f"lgpio chip {chip_num} failed: {e}")
+                    logger.debug("lgpio chip %s failed: %s", chip_num, e)
                     try:
                         # Ensure chip is closed if opened
                         if 'chip' in locals():
@@ -160,6 +404,13 @@ class ButtonMonitor:
                     except Exception:
                         pass
                     continue
+
+            if cached_chip is not None:
+                # The cached layout no longer works; rescan from scratch next time
+                try:
+                    os.unlink(_CHIP_CACHE)
+                except OSError:
+                    pass
             
             if last_err:
                 raise last_err
@@ -172,9 +423,8 @@ class ButtonMonitor:
 
         # Method 2: Try gpiozero with same pin factory as LED tests
         try:
-            import os
-            os.environ['GPIOZERO_PIN_FACTORY'] = 'native'
-            from gpiozero import Button
+            if Button is None:
+                raise ImportError("No module named 'gpiozero'")
             logger.info("✅ gpiozero import successful")
             
             button = Button(self.gpio_pin, pull_up=True, bounce_time=0.1)
@@ -186,6 +436,13 @@ class ButtonMonitor:
             
             self.button_obj = {'button': button, 'type': 'gpiozero_simple'}
             self.gpio_lib = "gpiozero"
+            # Bind the property getter itself so each read skips a wrapper frame
+            self._read_impl = type(button).is_pressed.fget.__get__(button)
+
+            # gpiozero delivers edges from its own thread
+            button.when_pressed = self._on_press
+            button.when_released = self._on_release
+            self._edge_driven = True
             logger.info("🎉 SUCCESS: Button using gpiozero")
             return True
             
@@ -202,6 +459,8 @@ class ButtonMonitor:
         try:
             button_trigger_file = "/tmp/button_trigger"
             self.button_obj = {'type': 'file_based', 'trigger_file': button_trigger_file}
+            self._edge_driven = False
+            self._read_impl = self._read_trigger_file
             self.gpio_lib = "file-based-simulation"
             logger.info(f"✅ File-based button simulation ready")
             logger.info(f"📁 Trigger: touch {button_trigger_file}")
@@ -212,42 +471,51 @@ class ButtonMonitor:
         logger.error("❌ NO WORKING GPIO METHODS FOUND")
         return False
 
-    def is_button_pressed(self):
-        """Check button state with explicit debugging"""
-        try:
-            if not self.button_obj:
-                return False
+    def _on_press(self):
+        """Edge handler: button went down"""
+        self._release_event.clear()
+        self._press_event.set()
 
-            button_type = self.button_obj.get('type')
+    def _on_release(self):
+        """Edge handler: button came back up"""
+        self._press_event.clear()
+        self._release_event.set()
 
-            if button_type == 'lgpio_simple':
-                import lgpio
-                chip = self.button_obj['chip']
-                pin = self.button_obj['pin']
-                value = lgpio.gpio_read(chip, pin)
-                # Active low with pull-up: 0 = pressed, 1 = released
-                pressed = (value == 0)
-                return pressed
+    def _edge_cb(self, chip, gpio, level, timestamp):
+        """lgpio alert callback - active low with pull-up: 0 = pressed, 1 = released"""
+        if level == 0:
+            self._press_ns = timestamp
+            self._held_ns = None
+            self._on_press()
+        elif level == 1:
+            if self._press_ns is not None:
+                self._held_ns = timestamp - self._press_ns
+            self._on_release()
+        # level 2 is a watchdog timeout, not an edge
 
-            elif button_type == 'gpiozero_simple':
-                pressed = self.button_obj['button'].is_pressed
-                return pressed
+    def _read_none(self):
+        """Reader used before setup and after cleanup"""
+        return False
 
-            elif button_type == 'file_based':
-                # Check if trigger file exists and remove it
-                trigger_file = self.button_obj['trigger_file']
-                if os.path.exists(trigger_file):
-                    try:
-                        os.remove(trigger_file)
-                        logger.info("📁 File-based button trigger detected and removed")
-                        return True  # Button press detected
-                    except Exception as e:
-                        logger.debug(f"Failed to remove trigger file: {e}")
-                        pass
-                return False
+    def _read_trigger_file(self):
+        """File-based simulation: a press is the trigger file appearing"""
+        # Consuming the trigger is the existence check: one unlink, no stat
+        try:
+            os.unlink(self.button_obj['trigger_file'])
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.debug("Failed to remove trigger file: %s", e)
+            return False
+        logger.info("📁 File-based button trigger detected and removed")
+        return True  # Button press detected
 
+    def is_button_pressed(self):
+        """Check button state using the reader selected during setup"""
+        try:
+            return self._read_impl()
         except Exception as e:
-            logger.error(f"🔘 Error reading GPIO button: {str(e)}")
+            logger.error("🔘 Error reading GPIO button: %s", e)
 
         return False
 
@@ -260,7 +528,9 @@ class ButtonMonitor:
             button_type = self.button_obj.get('type')
 
             if button_type == 'lgpio_simple':
-                import lgpio
+                callback = self.button_obj.get('callback')
+                if callback is not None:
+                    callback.cancel()
                 chip = self.button_obj['chip']
                 lgpio.gpiochip_close(chip)
                 logger.debug("✅ lgpio cleanup completed")
@@ -277,110 +547,278 @@ class ButtonMonitor:
             elif button_type == 'file_based':
                 # Clean up trigger file if it exists
                 try:
-                    trigger_file = self.button_obj['trigger_file']
-                    if os.path.exists(trigger_file):
-                        os.remove(trigger_file)
-                    logger.debug("✅ File-based cleanup completed")
-                except:
+                    os.unlink(self.button_obj['trigger_file'])
+                except FileNotFoundError:
                     pass
+                except OSError as e:
+                    logger.debug("Could not remove trigger file: %s", e)
+                else:
+                    logger.debug("✅ File-based cleanup completed")
 
             self.button_obj = None
+            self._read_impl = self._read_none
 
         except Exception as e:
-            logger.debug(f"GPIO cleanup error: {str(e)}")
+            logger.debug("GPIO cleanup error: %s", e)
+
+    def _hold_prompts(self):
+        """(seconds held, message) feedback points logged during a long press"""
+        hold_time = self.hold_time
+        # Later entries win when hold_time makes two points coincide
+        prompts = {
+            hold_time - 1: f"🔘 HOLD TIMER: {hold_time - 1}/{hold_time}s - almost there...",
+            3: f"🔘 HOLD TIMER: 3/{hold_time}s - keep holding for reset...",
+            1: f"🔘 HOLD TIMER: 1/{hold_time}s - keep holding...",
+        }
+        return sorted((at, msg) for at, msg in prompts.items() if 0 < at < hold_time)
 
     def monitor_button_thread(self):
         """Button monitoring with explicit logging to track button presses"""
-        logger.info(f"🔘 BUTTON MONITORING: GPIO {self.gpio_pin}, hold for {self.hold_time}s to reset")
-        logger.info(f"🔘 BUTTON TYPE: {self.button_obj.get('type') if self.button_obj else 'None'}")
-        
-        hold_counter = 0
-        was_pressed = False
-        last_file_based_message = 0
-        
-        # Add explicit button state logging every 10 seconds for hardware debugging
-        last_status_log = 0
+        logger.info("🔘 BUTTON MONITORING: GPIO %s, hold for %ss to reset", self.gpio_pin, self.hold_time)
+        logger.info("🔘 BUTTON TYPE: %s", self.button_obj.get('type') if self.button_obj else 'None')
+
+        if self._edge_driven:
+            self._monitor_button_edges()
+            return
+
+        if self.button_obj and self.button_obj.get('type') == 'file_based' and INotify is not None:
+            self._monitor_trigger_file()
+            return
         
+        # Bind everything the polling loops touch to locals once; these loops
+        # run every second for the lifetime of the process
+        is_pressed = self.is_button_pressed
+        # Waits on the wake pipe, so stop() or a signal ends the sleep at once
+        sleep = self._idle
+        monotonic = time.monotonic
+        hold_time = self.hold_time
+        gpio_pin = self.gpio_pin
+        button_type = self.button_obj.get('type') if self.button_obj else 'None'
+
+        # Explicit button state logging every 10 seconds for hardware debugging;
+        # the level is checked once so a quieter logger skips building the state
+        last_status_log = float('-inf')
+        info_enabled = logger.isEnabledFor(logging.INFO)
+
         try:
-            while self.running:
-                current_pressed = self.is_button_pressed()
-                current_time = time.time()
-                
-                # Log button state every 10 seconds for debugging
-                if current_time - last_status_log > 10:
-                    button_type = self.button_obj.get('type') if self.button_obj else 'None'
-                    logger.info(f"🔘 STATUS: Button type={button_type}, state={'PRESSED' if current_pressed else 'RELEASED'}")
-                    last_status_log = current_time
-                
-                # Special handling for file-based simulation
-                if self.button_obj and self.button_obj.get('type') == 'file_based':
+            if button_type == 'file_based':
+                # File-based simulation without inotify: poll for the trigger file
+                trigger_file = self.button_obj['trigger_file']
+                last_file_based_message = float('-inf')
+
+                while self.running:
+                    current_pressed = is_pressed()
+                    current_time = monotonic()
+
+                    if info_enabled and current_time - last_status_log > 10:
+                        logger.info("🔘 STATUS: Button type=%s, state=%s",
+                                    button_type, 'PRESSED' if current_pressed else 'RELEASED')
+                        last_status_log = current_time
+
                     # Show reminder every 5 minutes for file-based simulation
                     if current_time - last_file_based_message > 300:  # 5 minutes
-                        trigger_file = self.button_obj['trigger_file']
-                        logger.info(f"📁 File-based button active - run 'touch {trigger_file}' to trigger reset")
+                        logger.info("📁 File-based button active - run 'touch %s' to trigger reset", trigger_file)
                         last_file_based_message = current_time
-                    
+
                     if current_pressed:
                         logger.info("🚨 FILE-BASED RESET TRIGGERED!")
                         self.reset_wifi_config()
                         break
-                    
-                    time.sleep(1)
-                    continue
-                
+
+                    sleep(1)
+                return
+
+            # Hardware button polling (edge alerts unavailable). Hold time is
+            # measured on the monotonic clock, so a slow iteration can't
+            # stretch or shrink the long press
+            hold_prompts = self._hold_prompts()
+            press_start = None
+            next_prompt = 0
+
+            while self.running:
+                current_pressed = is_pressed()
+                current_time = monotonic()
+
+                if info_enabled and current_time - last_status_log > 10:
+                    logger.info("🔘 STATUS: Button type=%s, state=%s",
+                                button_type, 'PRESSED' if current_pressed else 'RELEASED')
+                    last_status_log = current_time
+
                 # Hardware button monitoring with explicit state change logging
                 if current_pressed:
-                    if not was_pressed:
-                        logger.info(f"🔘 BUTTON PRESSED: GPIO {self.gpio_pin} - starting hold timer")
-                        hold_counter = 0
-                    
-                    hold_counter += 1
-                    
-                    # Provide feedback during hold
-                    if hold_counter == 1:
-                        logger.info(f"🔘 HOLD TIMER: 1/{self.hold_time}s - keep holding...")
-                    elif hold_counter == 3:
-                        logger.info(f"🔘 HOLD TIMER: 3/{self.hold_time}s - keep holding for reset...")
-                    elif hold_counter == self.hold_time - 1:
-                        logger.info(f"🔘 HOLD TIMER: {hold_counter}/{self.hold_time}s - almost there...")
-                    
+                    if press_start is None:
+                        logger.info("🔘 BUTTON PRESSED: GPIO %s - starting hold timer", gpio_pin)
+                        press_start = current_time
+                        next_prompt = 0
+
+                    held = current_time - press_start
+
+                    # Provide feedback during hold; after a stall only the
+                    # latest prompt that came due is logged
+                    due = next_prompt
+                    while due < len(hold_prompts) and held >= hold_prompts[due][0]:
+                        due += 1
+                    if due > next_prompt:
+                        logger.info(hold_prompts[due - 1][1])
+                        next_prompt = due
+
                     # Trigger at hold time
-                    if hold_counter >= self.hold_time:
-                        logger.info(f"🚨 FACTORY RESET: Long press detected ({self.hold_time}s)!")
+                    if held >= hold_time:
+                        logger.info("🚨 FACTORY RESET: Long press detected (%ss)!", hold_time)
                         self.reset_wifi_config()
                         break
-                else:
-                    if was_pressed:
-                        logger.info(f"🔘 BUTTON RELEASED: GPIO {self.gpio_pin} after {hold_counter}s")
-                        if hold_counter < self.hold_time:
-                            logger.info(f"🔘 SHORT PRESS: {hold_counter}s < {self.hold_time}s - no reset")
-                    hold_counter = 0
-                
-                was_pressed = current_pressed
-                time.sleep(1)
-                
-        except KeyboardInterrupt:
-            logger.info("🔘 Button monitor interrupted")
-        except Exception as e:
-            logger.error(f"🔘 Button monitor error: {str(e)}")
-            # Try to recover from error
-            if self.reinitialize_gpio():
-                logger.info("🔘 Recovered from GPIO error, continuing...")
-                # Restart monitoring
-                self.monitor_button_thread()
+
+                    # Wake for the next prompt or the hold deadline rather
+                    # than up to a second after it
+                    next_due = hold_prompts[next_prompt][0] if next_prompt < len(hold_prompts) else hold_time
+                    sleep(min(1.0, next_due - held))
+                    continue
+
+                if press_start is not None:
+                    held = current_time - press_start
+                    logger.info("🔘 BUTTON RELEASED: GPIO %s after %.1fs", gpio_pin, held)
+                    logger.info("🔘 SHORT PRESS: %.1fs < %ss - no reset", held, hold_time)
+                    press_start = None
+
+                sleep(1)
+
         finally:
             self.cleanup_gpio()
 
+    def _monitor_button_edges(self):
+        """Event-driven monitoring: block on press/release edges instead of polling"""
+        logger.info("🔘 BUTTON MONITORING: edge-driven (no polling)")
+        hold_prompts = self._hold_prompts()
+
+        try:
+            while self.running:
+                # Bounded wait: a signal handler only clears self.running, so
+                # re-check it every second rather than block on the edge
+                if not self._press_event.wait(timeout=1.0):
+                    continue
+                self._press_event.clear()
+
+                # Ignore bounces that have already released again
+                if not self.is_button_pressed():
+                    continue
+
+                logger.info("🔘 BUTTON PRESSED: GPIO %s - starting hold timer", self.gpio_pin)
+                press_start = time.monotonic()
+
+                # Sleep until each feedback point (then the hold time) unless
+                # the release edge arrives first
+                released = False
+                for at, message in hold_prompts + [(self.hold_time, None)]:
+                    remaining = press_start + at - time.monotonic()
+                    released = self._release_event.wait(timeout=max(0.0, remaining))
+                    if released or not self.running or message is None:
+                        break
+                    logger.info(message)
+                if not self.running:
+                    break
+
+                held = time.monotonic() - press_start
+                if released and self._held_ns is not None:
+                    # Kernel edge timestamps are exact; our wakeup may lag them
+                    held = self._held_ns / 1e9
+                if released or not self.is_button_pressed():
+                    logger.info("🔘 BUTTON RELEASED: GPIO %s after %.1fs", self.gpio_pin, held)
+                    logger.info("🔘 SHORT PRESS: %.1fs < %ss - no reset", held, self.hold_time)
+                    continue
+
+                logger.info("🚨 FACTORY RESET: Long press detected (%ss)!", self.hold_time)
+                self.reset_wifi_config()
+                break
+
+        finally:
+            self.cleanup_gpio()
+
+    def _monitor_trigger_file(self):
+        """File-based simulation: wait on inotify for the trigger file instead of stat polling"""
+        trigger_file = self.button_obj['trigger_file']
+        watch_dir, trigger_name = os.path.split(trigger_file)
+        logger.info("📁 BUTTON MONITORING: inotify watch on %s for %s", watch_dir, trigger_name)
+
+        try:
+            with INotify() as inotify, selectors.DefaultSelector() as selector:
+                inotify.add_watch(watch_dir, inotify_flags.CREATE | inotify_flags.MOVED_TO)
+                # Register both fds once (epoll) instead of passing them to
+                # select() on every wake-up
+                selector.register(inotify, selectors.EVENT_READ)
+                selector.register(self._wake_r, selectors.EVENT_READ)
+                next_reminder = 0.0
+                # Check once up front to catch a trigger created before the
+                # watch was added; afterwards only events naming it matter
+                triggered = True
+
+                while self.running:
+                    if triggered and self.is_button_pressed():
+                        logger.info("🚨 FILE-BASED RESET TRIGGERED!")
+                        self.reset_wifi_config()
+                        break
+
+                    now = time.monotonic()
+                    if now >= next_reminder:
+                        logger.info("📁 File-based button active - run 'touch %s' to trigger reset", trigger_file)
+                        next_reminder = now + 300  # 5 minutes
+
+                    for key, _ in selector.select(next_reminder - now):
+                        if key.fileobj == self._wake_r:
+                            # Drain the wake pipe as _idle() does, or every
+                            # select after a stop() or signal returns at once
+                            os.read(self._wake_r, 512)
+                    # Drain queued events; other files come and go in the
+                    # watched directory without needing a stat of the trigger
+                    triggered = any(event.name == trigger_name for event in inotify.read(timeout=0))
+        finally:
+            self.cleanup_gpio()
+
+    def _wake(self):
+        """Unblock a select-based wait in the monitor"""
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass
+
+    def _idle(self, seconds):
+        """Sleep up to `seconds`, returning early on _wake() or a signal"""
+        if select.select([self._wake_r], [], [], seconds)[0]:
+            os.read(self._wake_r, 512)
+
     def reinitialize_gpio(self):
         """Try to reinitialize GPIO after an error"""
         try:
             self.cleanup_gpio()
-            time.sleep(1)
+            self._idle(1)
+            if not self.running:
+                # Shutdown arrived while waiting; don't claim the pin again
+                return False
             return self.setup_gpio()
         except Exception as e:
             logger.error(f"GPIO reinitialization failed: {e}")
             return False
 
+    def _reset_wlan0_netlink(self):
+        """Cycle wlan0 and flush its addresses and routes over netlink
+
+        Does what WLAN0_RESET_SCRIPT does without spawning sh and ip. Returns
+        False when pyroute2 or wlan0 is missing so the caller can fall back.
+        """
+        if IPRoute is None:
+            return False
+        with IPRoute() as ipr:
+            links = ipr.link_lookup(ifname="wlan0")
+            if not links:
+                return False
+            index = links[0]
+            ipr.link("set", index=index, state="down")
+            ipr.flush_addr(index=index)
+            # Main table only, like `ip route show dev wlan0`; other
+            # interfaces' routes are never matched
+            ipr.flush_routes(oif=index, table=254)
+            ipr.link("set", index=index, state="up")
+        return True
+
     def reset_wifi_config(self):
         """Completely reset WiFi configuration while preserving ethernet and button monitor"""
         logger.info("🚨 RESET TRIGGERED - Resetting WiFi configuration...")
@@ -390,6 +828,10 @@ class ButtonMonitor:
             set_led_status('factory_reset')  # Blinking red to indicate reset in progress
         except Exception:
             pass
+
+        # Make the sibling helper modules importable once for every step below
+        if _SCRIPT_DIR not in sys.path:
+            sys.path.insert(0, _SCRIPT_DIR)
         
         # 1. Delete IP from Firestore FIRST (while network is still available)
         try:
@@ -397,8 +839,6 @@ class ButtonMonitor:
             from firestore_helper import FirestoreHelper
             
             # Get MAC address
-            import sys
-            sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
             from improved_ble_service import get_mac_address
             
             mac_address = get_mac_address()
@@ -419,8 +859,6 @@ class ButtonMonitor:
         # 2. CRITICAL FIX: Disconnect WiFi via Supervisor API (like HA UI "Reset Configuration")
         logger.info("🔄 Disconnecting WiFi via Home Assistant Supervisor API...")
         try:
-            import sys
-            sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
             from supervisor_api import SupervisorAPI
             
             supervisor = SupervisorAPI()
@@ -434,39 +872,35 @@ class ButtonMonitor:
                 logger.warning("⚠️ Supervisor API disconnect failed, falling back to manual reset")
                 # Fallback to manual reset if API fails
                 logger.info("🔄 Fallback: Manual wlan0 reset...")
-                self.run_command(["ip", "link", "set", "wlan0", "down"], timeout=10)
-                time.sleep(1)
-                self.run_command(["ip", "addr", "flush", "dev", "wlan0"], timeout=10)
-                time.sleep(1)
-                self.run_command(["sh", "-c", "ip route | grep wlan0 | while read route; do ip route del $route; done"], timeout=10)
-                time.sleep(1)
-                self.run_command(["ip", "link", "set", "wlan0", "up"], timeout=10)
-                time.sleep(2)
+                try:
+                    reset_done = self._reset_wlan0_netlink()
+                except Exception as e:
+                    logger.warning(f"⚠️ Netlink wlan0 reset failed ({e}), using ip commands")
+                    reset_done = False
+                if not reset_done:
+                    self.run_command(["sh", "-c", WLAN0_RESET_SCRIPT], timeout=15, capture_output=False)
+                time.sleep(1)  # Let the driver settle after link up
                 logger.info("✅ wlan0 interface reset manually (fallback)")
         except Exception as e:
             logger.error(f"❌ Failed to disconnect WiFi: {e}")
             logger.warning("⚠️ WiFi may not be fully reset")
         
         # 4. Remove WiFi configuration files only
-        config_files = [
-            self.config_file,
-            self.state_file,
-            "/tmp/wifi_onboarding.lock",
-            "/tmp/wpa_supplicant.conf"
-        ]
-        
-        for file_path in config_files:
+        # Unlink directly; a missing file is the common case, not an error
+        for file_path in (self.config_file, self.state_file) + _WIFI_TMP_FILES:
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.info(f"🗑️ Removed {file_path}")
-            except Exception as e:
+                os.unlink(file_path)
+                logger.info(f"🗑️ Removed {file_path}")
+            except FileNotFoundError:
+                pass
+            except OSError as e:
                 logger.error(f"Failed to remove {file_path}: {str(e)}")
 
 
         # 4. Create reset flag for main process
         try:
-            Path(self.reset_flag).touch()
+            # Only the flag's existence matters; create it with a bare open/close
+            os.close(os.open(self.reset_flag, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o644))
             logger.info(f"✅ Created reset flag at {self.reset_flag}")
         except Exception as e:
             logger.error(f"Failed to create reset flag: {str(e)}")
@@ -474,13 +908,18 @@ class ButtonMonitor:
         # 5. Signal main process for factory reset (don't kill it completely)
         try:
             # Prefer factory reset signal (SIGUSR2) to improved_ble_service.py
-            self.run_command(["pkill", "-USR2", "-f", "improved_ble_service.py"])
-            logger.info("✅ Signaled main process for FACTORY RESET (SIGUSR2)")
-            time.sleep(1)
-            # Fallback: also send WiFi reset signal (SIGUSR1)
-            self.run_command(["pkill", "-USR1", "-f", "improved_ble_service.py"])
-            logger.info("ℹ️ Also signaled WiFi reset (SIGUSR1) as fallback")
-            time.sleep(2)  # Give it time to process the signals
+            # Look the service up once; both signals go to the same pids
+            ble_pids = self._find_pids(_BLE_SERVICE_NAMES)
+            if self._signal_pids(ble_pids, signal.SIGUSR2):
+                logger.info("✅ Signaled main process for FACTORY RESET (SIGUSR2)")
+                time.sleep(1)
+                # Fallback: also send WiFi reset signal (SIGUSR1)
+                self._signal_pids(ble_pids, signal.SIGUSR1)
+                logger.info("ℹ️ Also signaled WiFi reset (SIGUSR1) as fallback")
+                # The service handles both signals on its own; nothing below
+                # waits on it, so there is no settle delay here
+            else:
+                logger.warning("⚠️ improved_ble_service.py not found - no reset signal sent")
         except Exception as e:
             logger.warning(f"Failed to signal main process: {e}")
 
@@ -491,11 +930,11 @@ class ButtonMonitor:
         logger.info("🌐 Ethernet connections remain active and accessible")
 
     def monitor_button(self):
-        """Main button monitoring loop with threading"""
+        """Main button monitoring loop, run directly on the main thread"""
         if not self.setup_gpio():
             logger.error("❌ Button monitoring FAILED - GPIO initialization failed")
             logger.info("Running GPIO diagnostics to identify the problem...")
-            self.diagnose_gpio_access()
+            self.diagnose_gpio_access(verbose=logger.isEnabledFor(logging.DEBUG))
             
             # Don't exit - the file-based fallback should be available
             if not self.button_obj or self.button_obj.get('type') != 'file_based':
@@ -506,27 +945,31 @@ class ButtonMonitor:
 
         logger.info(f"🎛️  Monitoring GPIO {self.gpio_pin}, hold for {self.hold_time}s to reset")
         
-        # Start monitoring in thread
-        self.monitor_thread = threading.Thread(target=self.monitor_button_thread)
-        self.monitor_thread.daemon = True
-        self.monitor_thread.start()
-        
-        # Keep main thread alive
+        # Monitor on this thread; a crash or completed reset re-arms GPIO and
+        # loops instead of being detected by a polling supervisor thread
+        crash_delay = 1
         try:
             while self.running:
-                # Check if monitoring thread is still alive
-                if not self.monitor_thread.is_alive():
-                    logger.warning("Button monitoring thread died, restarting...")
-                    # Reinitialize GPIO before restarting thread
-                    if not self.setup_gpio():
-                        logger.error("Failed to reinitialize GPIO, retrying in 10 seconds...")
-                        time.sleep(10)
-                        continue
-                    self.monitor_thread = threading.Thread(target=self.monitor_button_thread)
-                    self.monitor_thread.daemon = True
-                    self.monitor_thread.start()
-                
-                time.sleep(5)
+                started = time.monotonic()
+                try:
+                    self.monitor_button_thread()
+                except Exception as e:
+                    logger.error(f"🔘 Button monitor error: {str(e)}")
+                    # A monitor that fails straight after re-init would spin
+                    # through cleanup/setup; back off until a run lasts a minute
+                    if time.monotonic() - started < 60:
+                        self._idle(crash_delay)
+                        crash_delay = min(crash_delay * 2, 60)
+                    else:
+                        crash_delay = 1
+
+                if not self.running:
+                    break
+
+                logger.warning("Button monitoring stopped, reinitializing GPIO...")
+                while self.running and not self.reinitialize_gpio():
+                    logger.error("Failed to reinitialize GPIO, retrying in 10 seconds...")
+                    self._idle(10)
         except KeyboardInterrupt:
             logger.info("Button monitor main loop interrupted")
         finally:
@@ -536,12 +979,16 @@ class ButtonMonitor:
     def stop(self):
         """Stop button monitoring"""
         self.running = False
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=5)
-        self.cleanup_gpio()
+        # Wake the monitor so it can observe running == False; it releases
+        # GPIO itself once its loop has exited
+        self._wake()
 
-    def diagnose_gpio_access(self):
-        """Diagnostic information for GPIO troubleshooting - Raspberry Pi 5 compatible"""
+    def diagnose_gpio_access(self, verbose=False):
+        """Diagnostic information for GPIO troubleshooting - Raspberry Pi 5 compatible
+
+        With verbose=True each available chip is also opened and GPIO 17 is
+        claimed and read on it; otherwise only device nodes are reported.
+        """
         logger.info("=== RASPBERRY PI 5 GPIO DIAGNOSTICS ===")
         
         # Check for Raspberry Pi model
@@ -555,21 +1002,19 @@ class ButtonMonitor:
             logger.info(f"ℹ️ Could not detect Pi model: {e}")
         
         # Check for GPIO devices - RPi 5 specific
-        gpio_devices = [
-            "/dev/gpiomem", 
-            "/dev/gpiochip0",   # Legacy
-            "/dev/gpiochip4",   # RPi 5
-            "/dev/gpiochip10",  # RPi 5  
-            "/dev/gpiochip11",  # RPi 5
-            "/dev/gpiochip12",  # RPi 5
-            "/dev/gpiochip13",  # RPi 5
-            "/dev/mem"
-        ]
-        
-        for device in gpio_devices:
-            if os.path.exists(device):
+        # One directory scan answers every "does it exist?" question below,
+        # and its entries are reused for the permission lookups
+        try:
+            with os.scandir('/dev') as it:
+                dev_entries = {entry.name: entry for entry in it}
+        except OSError:
+            dev_entries = {}
+
+        for device in _GPIO_DEVS:
+            entry = dev_entries.get(os.path.basename(device))
+            if entry is not None:
                 try:
-                    stat = os.stat(device)
+                    stat = entry.stat()
                     logger.info(f"✅ {device} exists (permissions: {oct(stat.st_mode)})")
                 except Exception as e:
                     logger.info(f"❌ {device} exists but stat failed: {e}")
@@ -579,15 +1024,18 @@ class ButtonMonitor:
         # Check GPIO chip information - RPi 5 specific
         logger.info("🔍 Checking GPIO chips for RPi 5...")
         chips_found = []
-        for chip_num in [0, 4, 10, 11, 12, 13]:
-            chip_path = f"/dev/gpiochip{chip_num}"
-            if os.path.exists(chip_path):
+        for chip_num in _GPIO_CHIPS:
+            if f"gpiochip{chip_num}" in dev_entries:
                 chips_found.append(chip_num)
                 logger.info(f"✅ GPIO chip {chip_num} available")
                 
                 # Try to test GPIO 17 on this chip if lgpio is available
+                if not verbose:
+                    continue
+                if lgpio is None:
+                    logger.info(f"   ❌ lgpio not available to test chip {chip_num}")
+                    continue
                 try:
-                    import lgpio
                     chip = lgpio.gpiochip_open(chip_num)
                     try:
                         lgpio.gpio_claim_input(chip, 17, lgpio.SET_PULL_UP)
@@ -597,8 +1045,6 @@ class ButtonMonitor:
                     except Exception as e:
                         logger.info(f"   ❌ GPIO 17 not available on chip {chip_num}: {e}")
                     lgpio.gpiochip_close(chip)
-                except ImportError:
-                    logger.info(f"   ❌ lgpio not available to test chip {chip_num}")
                 except Exception as e:
                     logger.info(f"   ❌ Failed to test chip {chip_num}: {e}")
         
@@ -608,24 +1054,43 @@ class ButtonMonitor:
             logger.error("❌ No GPIO chips found! This may indicate a permission or kernel issue.")
         
         # Check for library installations
+        # lgpio and gpiozero were already imported at module load; RPi.GPIO is
+        # only located, not imported, since nothing here uses it
         libraries = [
-            ("lgpio", "import lgpio", "Raspberry Pi 5 preferred"),
-            ("gpiozero", "import gpiozero", "Universal GPIO library"), 
-            ("RPi.GPIO", "import RPi.GPIO", "Legacy GPIO library")
+            ("lgpio", lgpio is not None, "Raspberry Pi 5 preferred"),
+            ("gpiozero", Button is not None, "Universal GPIO library"),
+            ("RPi.GPIO", _module_available("RPi.GPIO"), "Legacy GPIO library")
         ]
         
         logger.info("📚 GPIO Library availability:")
-        for lib_name, import_cmd, description in libraries:
-            try:
-                exec(import_cmd)
+        for lib_name, available, description in libraries:
+            if available:
                 logger.info(f"✅ {lib_name} library available ({description})")
-            except ImportError:
+            else:
                 logger.info(f"❌ {lib_name} library not available ({description})")
         
         logger.info("=== END RPi 5 GPIO DIAGNOSTICS ===")
 
-    def get_system_info(self):
-        """Get system information for debugging"""
+    def _wlan0_status_netlink(self):
+        """Operational state and addresses of wlan0, queried over netlink"""
+        with IPRoute() as ipr:
+            links = ipr.link_lookup(ifname="wlan0")
+            if not links:
+                return "not found"
+            index = links[0]
+            link = ipr.get_links(index)[0]
+            return {
+                "state": link.get_attr("IFLA_OPERSTATE"),
+                "addrs": [addr.get_attr("IFA_ADDRESS") for addr in ipr.get_addr(index=index)],
+            }
+
+    def get_system_info(self, max_age=2.0):
+        """Get system information for debugging (cached for max_age seconds)"""
+        now = time.monotonic()
+        cached_at, cached_info = self._sysinfo_cache
+        if cached_info is not None and now - cached_at < max_age:
+            return cached_info
+
         info = {
             "gpio_pin": self.gpio_pin,
             "hold_time": self.hold_time,
@@ -634,29 +1099,30 @@ class ButtonMonitor:
             "reset_flag_exists": os.path.exists(self.reset_flag)
         }
         
-        try:
-            # Check if GPIO is available
-            info["gpio_available"] = os.path.exists(f"/sys/class/gpio/gpio{self.gpio_pin}")
-        except:
-            info["gpio_available"] = False
+        # Check if GPIO is available (exists() never raises)
+        info["gpio_available"] = os.path.exists(self._sysfs_gpio_dir)
         
         # Check wlan0 status
         try:
-            result = self.run_command(["ip", "addr", "show", "wlan0"])
-            info["wlan0_status"] = result.stdout if result and result.returncode == 0 else "not found"
-        except:
+            if IPRoute is not None:
+                info["wlan0_status"] = self._wlan0_status_netlink()
+            else:
+                result = self.run_command(["ip", "addr", "show", "wlan0"])
+                info["wlan0_status"] = result.stdout if result and result.returncode == 0 else "not found"
+        except Exception:
             info["wlan0_status"] = "error"
         
+        self._sysinfo_cache = (now, info)
         return info
 
 def main():
     """Entry point with signal handling and enhanced error recovery"""
     # Parse command line arguments
-    import argparse
     parser = argparse.ArgumentParser(description='WiFi Onboarding Button Monitor')
     parser.add_argument('--pin', type=int, default=17, help='GPIO pin number (default: 17)')
-    parser.add_argument('--hold', type=int, default=5, help='Hold time in seconds (default: 5)')
+    parser.add_argument('--hold', type=float, default=5.0, help='Hold time in seconds (default: 5)')
     parser.add_argument('--debounce', type=float, default=0.05, help='Debounce time in seconds (default: 0.05)')
+    parser.add_argument('--try-fallback-pins', action='store_true', help='Also try GPIO 17 and 11 if the configured pin fails')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     parser.add_argument('--test', action='store_true', help='Test GPIO and exit')
     args = parser.parse_args()
@@ -668,14 +1134,15 @@ def main():
     # Create monitor instance
     monitor = ButtonMonitor(
         gpio_pin=args.pin,
-        hold_time=args.hold,
-        debounce_time=args.debounce
+        hold_time=int(args.hold) if args.hold.is_integer() else args.hold,
+        debounce_time=args.debounce,
+        try_fallback_pins=args.try_fallback_pins
     )
 
     # Test mode
     if args.test:
         logger.info("Testing GPIO setup...")
-        monitor.diagnose_gpio_access()
+        monitor.diagnose_gpio_access(verbose=True)
         
         if monitor.setup_gpio():
             logger.info("✅ GPIO setup successful")
@@ -699,34 +1166,39 @@ def main():
     # Setup signal handlers
     def handle_signal(signum, frame):
         logger.info(f"Received signal {signum}, shutting down...")
+        # Only flip the flag: this runs on the monitor's own thread, which may
+        # be inside an Event or GPIO call. The wakeup fd below ends select
+        # waits and edge waits time out, then the loop cleans up on its way out
         monitor.running = False
     
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
+    # Signals also land on the wake pipe, so select-based waits return at once
+    signal.set_wakeup_fd(monitor._wake_w, warn_on_full_buffer=False)
 
     # Log startup info
     logger.info("🚀 Starting Button Monitor for WiFi Reset")
     logger.info(f"System info: {monitor.get_system_info()}")
 
-    # Start monitoring with retry logic
+    # Start monitoring; after a crash, re-exec a fresh interpreter so no GPIO
+    # handles or monitor state leak into the retry. The count rides along in
+    # the environment since exec keeps it.
     max_restarts = 3
-    restart_count = 0
-    
-    while restart_count < max_restarts and monitor.running:
-        try:
-            monitor.monitor_button()
-            break  # Normal exit
-        except Exception as e:
+    restart_count = int(os.environ.get("BUTTON_MONITOR_RESTARTS", "0"))
+    try:
+        monitor.monitor_button()
+    except Exception as e:
+        logger.error(f"Button monitor crashed: {e}")
+        monitor.cleanup_gpio()
+        if restart_count >= max_restarts:
+            logger.error("Maximum restart attempts reached, giving up")
+        elif monitor.running:
             restart_count += 1
-            logger.error(f"Button monitor crashed: {e}")
-            
-            if restart_count < max_restarts:
-                logger.info(f"Restarting button monitor ({restart_count}/{max_restarts})...")
-                time.sleep(5)  # Brief delay before restart
-                monitor.cleanup_gpio()  # Clean up before retry
-            else:
-                logger.error("Maximum restart attempts reached, giving up")
-                break
+            logger.info(f"Restarting button monitor ({restart_count}/{max_restarts})...")
+            os.environ["BUTTON_MONITOR_RESTARTS"] = str(restart_count)
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.execv(sys.executable, [sys.executable, *sys.argv])
 
     logger.info("Button monitor shutdown complete")
 
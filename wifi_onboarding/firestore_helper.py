@@ -4,8 +4,10 @@ Firestore Helper for SMASH Hub
 Manages IP address storage in Firestore database
 """
 
+import functools
 import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +15,26 @@ logger = logging.getLogger(__name__)
 try:
     import firebase_admin
     from firebase_admin import credentials, firestore
+    from google.api_core import exceptions as gexc
+    from google.api_core.retry import Retry, if_exception_type
+    RETRYABLE_ERRORS = (gexc.ServiceUnavailable, gexc.DeadlineExceeded, gexc.InternalServerError)
     FIREBASE_AVAILABLE = True
 except ImportError:
     logger.warning('⚠️ Firebase Admin SDK not installed')
     FIREBASE_AVAILABLE = False
 
+# Shared by every FirestoreHelper (callers create one per operation) so
+# fire-and-forget writes don't each spin up their own threads
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='firestore')
+
+# smash_db/<MAC> document references, kept at module level for the same
+# reason. firestore.client() returns the same client to every helper, so a
+# reference built by one helper stays valid for the next. A hub only ever
+# looks up its own MAC, so a handful of entries is plenty
+@functools.lru_cache(maxsize=8)
+def _doc_ref(db, mac_address: str):
+    return db.collection('smash_db').document(mac_address)
+
 
 class FirestoreHelper:
     """Helper class to manage Firestore operations for hub IP storage"""
@@ -52,28 +69,40 @@ class FirestoreHelper:
             logger.info('✅ Firestore client ready')
             
         except Exception as e:
-            logger.error(f'❌ Failed to initialize Firestore: {e}')
-            import traceback
-            logger.error(f'Stack trace: {traceback.format_exc()}')
+            logger.error(f'❌ Failed to initialize Firestore: {e}',
+                         exc_info=logger.isEnabledFor(logging.DEBUG))
+    
+    def _doc_ref(self, mac_address: str):
+        """Document reference for smash_db/<MAC>, built once per MAC"""
+        return _doc_ref(self.db, mac_address)
     
-    def save_hub_ip(self, mac_address: str, ip_address: str) -> bool:
+    def save_hub_ip(self, mac_address: str, ip_address: str) -> Future:
         """
         Save hub IP to Firestore: smash_db/<MAC>/home_ip
         
+        The write runs in the background so the caller doesn't wait on the
+        Firestore round-trip.
+        
         Args:
             mac_address: MAC address of the hub (e.g., "DC:A6:32:12:34:56")
             ip_address: Dynamic IP address (e.g., "192.168.1.105")
         
         Returns:
-            True if successful, False otherwise
+            Future resolving to True if successful, False otherwise
         """
         if not self.initialized or not self.db:
             logger.error('❌ Firestore not initialized, cannot save IP')
-            return False
+            future = Future()
+            future.set_result(False)
+            return future
         
+        return _executor.submit(self._save_hub_ip_sync, mac_address, ip_address)
+    
+    def _save_hub_ip_sync(self, mac_address: str, ip_address: str) -> bool:
+        """Blocking body of save_hub_ip"""
         try:
             # Reference to the document: smash_db/<MAC_ADDRESS>
-            doc_ref = self.db.collection('smash_db').document(mac_address)
+            doc_ref = self._doc_ref(mac_address)
             
             # Set/update the home_ip field
             doc_ref.set({
@@ -86,9 +115,8 @@ class FirestoreHelper:
             return True
             
         except Exception as e:
-            logger.error(f'❌ Failed to save IP to Firestore: {e}')
-            import traceback
-            logger.error(f'Stack trace: {traceback.format_exc()}')
+            logger.error(f'❌ Failed to save IP to Firestore: {e}',
+                         exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
     
     def get_hub_ip(self, mac_address: str) -> str:
@@ -106,7 +134,7 @@ class FirestoreHelper:
             return None
         
         try:
-            doc_ref = self.db.collection('smash_db').document(mac_address)
+            doc_ref = self._doc_ref(mac_address)
             doc = doc_ref.get()
             
             if doc.exists:
@@ -138,36 +166,36 @@ class FirestoreHelper:
             logger.error('❌ Firestore not initialized, cannot delete IP')
             return False
         
-        for attempt in range(1, max_retries + 1):
-            try:
-                logger.info(f'🔄 Firestore deletion attempt {attempt}/{max_retries} (timeout: {timeout_per_attempt}s)')
-                
-                # Reference to the document: smash_db/<MAC_ADDRESS>
-                doc_ref = self.db.collection('smash_db').document(mac_address)
-                
-                # Delete the home_ip field (not the entire document)
-                # Use a short timeout to prevent long hangs during network reset
-                doc_ref.update({
-                    'home_ip': firestore.DELETE_FIELD,
-                    'reset_at': firestore.SERVER_TIMESTAMP
-                }, timeout=timeout_per_attempt)
-                
-                logger.info(f'✅ Deleted IP from Firestore for MAC: {mac_address} (attempt {attempt})')
-                logger.info(f'🔄 Network reset completed - app will detect missing IP')
-                return True
-                
-            except Exception as e:
-                logger.warning(f'⚠️ Attempt {attempt}/{max_retries} failed: {str(e)[:100]}')
-                
-                if attempt < max_retries:
-                    # Wait a bit before retrying (but not too long)
-                    import time
-                    wait_time = 0.5 * attempt  # 0.5s, 1s, 1.5s
-                    logger.info(f'⏳ Waiting {wait_time}s before retry...')
-                    time.sleep(wait_time)
-                else:
-                    # Final attempt failed
-                    logger.error(f'❌ Failed to delete IP from Firestore after {max_retries} attempts')
-                    import traceback
-                    logger.error(f'Stack trace: {traceback.format_exc()}')
+        # Retry transient failures inside the gRPC client with jittered
+        # exponential backoff (0.25s, 0.5s, 1s, ... capped at 4s). Anything
+        # else, e.g. PERMISSION_DENIED or INVALID_ARGUMENT, fails on the
+        # first attempt since repeating the same request can't fix it.
+        retry = Retry(
+            predicate=if_exception_type(*RETRYABLE_ERRORS),
+            initial=0.25,
+            multiplier=2,
+            maximum=4.0,
+            timeout=timeout_per_attempt * max_retries,
+        )
+        
+        try:
+            logger.info(f'🔄 Deleting IP from Firestore (retrying for up to {timeout_per_attempt * max_retries}s, {timeout_per_attempt}s per attempt)')
+            
+            # Reference to the document: smash_db/<MAC_ADDRESS>
+            doc_ref = self._doc_ref(mac_address)
+            
+            # Delete the home_ip field (not the entire document)
+            # Use a short timeout to prevent long hangs during network reset
+            doc_ref.update({
+                'home_ip': firestore.DELETE_FIELD,
+                'reset_at': firestore.SERVER_TIMESTAMP
+            }, retry=retry, timeout=timeout_per_attempt)
+            
+            logger.info(f'✅ Deleted IP from Firestore for MAC: {mac_address}')
+            logger.info(f'🔄 Network reset completed - app will detect missing IP')
+            return True
+            
+        except Exception as e:
+            logger.error(f'❌ Failed to delete IP from Firestore: {str(e)[:100]}',
+                         exc_info=logger.isEnabledFor(logging.DEBUG))
             return False
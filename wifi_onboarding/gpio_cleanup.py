@@ -6,10 +6,35 @@ Cleans up any existing GPIO usage to prevent 'GPIO busy' errors
 
 import logging
 import os
+import signal
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Scripts that hold GPIO lines and must not survive into the new run
+GPIO_PROCESSES = ("led_controller", "button_monitor")
+
+def kill_gpio_processes():
+    """SIGTERM every process whose command line mentions a GPIO script.
+    
+    One walk of /proc matches like `pkill -f` for all names at once, instead
+    of forking a shell and pkill per name.
+    """
+    own_pid = os.getpid()
+    killed = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().decode(errors='replace')
+            if any(name in cmdline for name in GPIO_PROCESSES):
+                os.kill(int(entry), signal.SIGTERM)
+                killed += 1
+        except OSError:
+            pass  # Exited mid-scan or not ours to signal
+    return killed
+
 def cleanup_gpio_resources():
     """Clean up any existing GPIO resources that might be in use"""
     logger.info("🧹 Starting GPIO resource cleanup...")
@@ -59,12 +84,8 @@ def cleanup_gpio_resources():
         logger.debug("RPi.GPIO cleanup failed")
     
     # Kill any existing processes that might be using GPIO
-    try:
-        os.system("pkill -f led_controller 2>/dev/null || true")
-        os.system("pkill -f button_monitor 2>/dev/null || true")
-        logger.info("🧹 Killed existing GPIO processes")
-    except:
-        pass
+    killed = kill_gpio_processes()
+    logger.info(f"🧹 Killed {killed} existing GPIO processes")
     
     logger.info("✅ GPIO cleanup complete")
 
@@ -5,6 +5,7 @@ Improved SMASH BLE Service with proper D-Bus integration for Home Assistant OS
 
 import os
 import sys
+import atexit
 import logging
 import subprocess
 import time
@@ -238,8 +239,23 @@ def get_mac_address():
         return None
 
 
+# The status file stays open across writes; LED updates come in bursts
+_LED_STATUS_FILE = "/tmp/led_status"
+_LED_FD = None
+_LED_LOCK = threading.Lock()
+
+def _close_led_fd():
+    global _LED_FD
+    with _LED_LOCK:
+        if _LED_FD is not None:
+            os.close(_LED_FD)
+            _LED_FD = None
+
+atexit.register(_close_led_fd)
+
 def set_led_status(status: str):
     """Helper function to control the LED by writing to a status file."""
+    global _LED_FD
     try:
         # Validate status before setting
         valid_statuses = [
@@ -253,8 +269,14 @@ def set_led_status(status: str):
             logger.error(f"🚥 INVALID LED STATUS: '{status}' - using 'error' instead")
             status = 'error'
         
-        with open("/tmp/led_status", 'w') as f:
-            f.write(status)
+        data = status.encode()
+        with _LED_LOCK:
+            if _LED_FD is None:
+                _LED_FD = os.open(_LED_STATUS_FILE, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o644)
+            # Truncate then write: the LED controller ignores the empty read
+            # in between, just as it did with open(..., 'w')
+            os.ftruncate(_LED_FD, 0)
+            os.pwrite(_LED_FD, data, 0)
         logger.info(f"🚥 LED status set to: {status}")
     except Exception as e:
         logger.error(f"Failed to write LED status: {e}")
@@ -410,7 +432,6 @@ http:
         for attempt in range(max_attempts):
             try:
                 # Test if Home Assistant is listening on the Ethernet IP
-                import socket
                 test_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
                 test_socket.settimeout(3)
                 result = test_socket.connect_ex((eth_ip, 8123))
@@ -509,7 +530,6 @@ def update_network_led_status():
     """
     try:
         # Rate limiting for instant transitions
-        import time
         current_time = time.time()
         if hasattr(update_network_led_status, 'last_call_time'):
             if current_time - update_network_led_status.last_call_time < 0.05:
@@ -1003,11 +1023,13 @@ class WiFiController:
                 if FIRESTORE_AVAILABLE:
                     try:
                         firestore_helper = FirestoreHelper()
-                        success = firestore_helper.save_hub_ip(mac_address, wifi_ip)
-                        if success:
-                            logger.info(f"✅ IP saved to Firestore: smash_db/{mac_address}/home_ip = {wifi_ip}")
-                        else:
-                            logger.warning(f"⚠️ Failed to save IP to Firestore")
+                        # The write finishes in the background; don't hold up the BLE reply
+                        def _log_save(future, mac_address=mac_address, wifi_ip=wifi_ip):
+                            if future.result():
+                                logger.info(f"✅ IP saved to Firestore: smash_db/{mac_address}/home_ip = {wifi_ip}")
+                            else:
+                                logger.warning(f"⚠️ Failed to save IP to Firestore")
+                        firestore_helper.save_hub_ip(mac_address, wifi_ip).add_done_callback(_log_save)
                     except Exception as e:
                         logger.error(f"❌ Error saving IP to Firestore: {e}")
                 else:
@@ -1063,7 +1085,6 @@ class WiFiController:
         except Exception as e:
             logger.error(f"❌ Failed to connect to WiFi via Supervisor API: {e}")
             logger.error(f"   Error details: {type(e).__name__}: {str(e)}")
-            import traceback
             logger.error(f"   Stack trace: {traceback.format_exc()}")
             set_led_status('error')
             return {"status": "error", "error": f"Connection failed: {str(e)}"}
@@ -1427,7 +1448,6 @@ class BLEGATTService:
             
         except Exception as e:
             logger.error(f"❌ Failed to start BLE service: {e}")
-            import traceback
             logger.error(f"Stack trace: {traceback.format_exc()}")
             return False
     
@@ -2381,7 +2401,6 @@ def main():
                             except Exception as e:
                                 logger.error(f"❌ SCENARIO 2: Failed to setup dual network routing: {e}")
                                 logger.error(f"❌ SCENARIO 2: Exception type: {type(e).__name__}")
-                                import traceback
                                 logger.error(f"❌ SCENARIO 2: Traceback: {traceback.format_exc()}")
 
                                 # Fallback: basic Ethernet setup
@@ -2436,7 +2455,6 @@ def main():
     logger.info("🚥 Setting initial LED status...")
     update_network_led_status()  # This will set correct LED status immediately
 
-    import threading
     monitor_thread = threading.Thread(target=network_monitor, daemon=True)
     monitor_thread.start()
     logger.info("🔍 Network monitoring started immediately for consistent LED behavior")
@@ -10,6 +10,19 @@ import logging
 import os
 import json
 
+# Import the GPIO backends once; set_led runs on every blink toggle
+try:
+    import lgpio
+except ImportError:
+    lgpio = None
+
+# Force native pin factory for container compatibility (read on first use)
+os.environ['GPIOZERO_PIN_FACTORY'] = 'native'
+try:
+    from gpiozero import LED
+except ImportError:
+    LED = None
+
 logger = logging.getLogger(__name__)
 
 class LEDController:
@@ -21,6 +34,8 @@ class LEDController:
         self.led_pins = {'red': self.red_pin, 'green': self.green_pin, 'blue': self.blue_pin}
         self.gpio_lib = None
         self.gpio_objects = {}
+        # Per-backend LED writer chosen once in setup_gpio
+        self._write_led = self._write_none
         
         self.led_enabled = os.getenv("ENABLE_LED", "true").lower() == "true"
         if not self.led_enabled:
@@ -64,7 +79,8 @@ class LEDController:
         
         # Try lgpio first (for RPi 5) with multiple chip support
         try:
-            import lgpio
+            if lgpio is None:
+                raise ImportError("No module named 'lgpio'")
             chips_to_try = [0, 4, 10, 11, 12, 13] # Added 4 for RPi5, more chips for compatibility
             for chip_num in chips_to_try:
                 try:
@@ -75,6 +91,7 @@ class LEDController:
                         lgpio.gpio_write(chip, pin, 0)  # Start with LEDs off
                         self.gpio_objects[color] = {'chip': chip, 'pin': pin, 'chip_num': chip_num}
                     self.gpio_lib = "lgpio"
+                    self._write_led = self._write_lgpio
                     logger.info(f"✅ LED GPIO initialized using lgpio on gpiochip{chip_num}")
                     return True
                 except Exception as e:
@@ -85,16 +102,15 @@ class LEDController:
 
         # Fallback to gpiozero (from reference implementation)
         try:
-            from gpiozero import LED
-            # Force native pin factory for container compatibility
-            import os
-            os.environ['GPIOZERO_PIN_FACTORY'] = 'native'
+            if LED is None:
+                raise ImportError("No module named 'gpiozero'")
             
             for color, pin in self.led_pins.items():
                 led = LED(pin)
                 led.off()  # Start with LED off
                 self.gpio_objects[color] = {'led': led, 'pin': pin}
             self.gpio_lib = "gpiozero"
+            self._write_led = self._write_gpiozero
             logger.info("✅ LED GPIO initialized using gpiozero")
             return True
         except Exception as e:
@@ -104,6 +120,7 @@ class LEDController:
         logger.warning("❌ All LED GPIO methods failed - LED control disabled")
         logger.info("LEDs will be simulated via log messages only")
         self.gpio_lib = "simulation"
+        self._write_led = self._write_simulation
         for color, pin in self.led_pins.items():
             self.gpio_objects[color] = {'simulation': True, 'pin': pin}
         return True  # Don't fail completely
@@ -113,25 +130,31 @@ class LEDController:
             return
             
         try:
-            if self.gpio_lib == "lgpio":
-                import lgpio
-                gpio_obj = self.gpio_objects[color]
-                lgpio.gpio_write(gpio_obj['chip'], gpio_obj['pin'], 1 if state else 0)
-            elif self.gpio_lib == "gpiozero":
-                led = self.gpio_objects[color]['led']
-                if state: 
-                    led.on()
-                else: 
-                    led.off()
-            elif self.gpio_lib == "simulation":
-                # Log simulation for debugging
-                pin = self.gpio_objects[color]['pin']
-                state_str = "ON" if state else "OFF"
-                logger.debug(f"🚥 LED {color.upper()} (GPIO {pin}): {state_str}")
+            self._write_led(color, state)
         except Exception as e:
             logger.error(f"❌ Failed to set {color} LED: {e}")
             logger.error(f"❌ Error setting {color} LED: {e}")
 
+    def _write_lgpio(self, color: str, state: bool):
+        gpio_obj = self.gpio_objects[color]
+        lgpio.gpio_write(gpio_obj['chip'], gpio_obj['pin'], 1 if state else 0)
+
+    def _write_gpiozero(self, color: str, state: bool):
+        led = self.gpio_objects[color]['led']
+        if state: 
+            led.on()
+        else: 
+            led.off()
+
+    def _write_simulation(self, color: str, state: bool):
+        # Log simulation for debugging
+        pin = self.gpio_objects[color]['pin']
+        state_str = "ON" if state else "OFF"
+        logger.debug(f"🚥 LED {color.upper()} (GPIO {pin}): {state_str}")
+
+    def _write_none(self, color: str, state: bool):
+        """Writer used before setup and after cleanup"""
+
     def _apply_status_pattern(self, status: str):
         if status not in self.status_patterns:
             logger.warning(f"⚠️ Unknown status pattern: {status}")
@@ -213,29 +236,25 @@ class LEDController:
 
             if self.gpio_lib == "lgpio":
                 # Properly release lgpio resources
-                try:
-                    import lgpio
-                    for color, gpio_obj in self.gpio_objects.items():
+                for color, gpio_obj in self.gpio_objects.items():
+                    try:
+                        chip = gpio_obj['chip']
+                        pin = gpio_obj['pin']
+                        lgpio.gpio_write(chip, pin, 0)  # Turn off
+                        lgpio.gpio_free(chip, pin)      # Free the pin
+                    except Exception as e:
+                        logger.debug(f"lgpio cleanup {color}: {e}")
+
+                # Close chip handles
+                closed_chips = set()
+                for gpio_obj in self.gpio_objects.values():
+                    chip = gpio_obj['chip']
+                    if chip not in closed_chips:
                         try:
-                            chip = gpio_obj['chip']
-                            pin = gpio_obj['pin']
-                            lgpio.gpio_write(chip, pin, 0)  # Turn off
-                            lgpio.gpio_free(chip, pin)      # Free the pin
+                            lgpio.gpiochip_close(chip)
+                            closed_chips.add(chip)
                         except Exception as e:
-                            logger.debug(f"lgpio cleanup {color}: {e}")
-
-                    # Close chip handles
-                    closed_chips = set()
-                    for gpio_obj in self.gpio_objects.values():
-                        chip = gpio_obj['chip']
-                        if chip not in closed_chips:
-                            try:
-                                lgpio.gpiochip_close(chip)
-                                closed_chips.add(chip)
-                            except Exception as e:
-                                logger.debug(f"lgpio chip close: {e}")
-                except ImportError:
-                    logger.debug("lgpio not available for cleanup")
+                            logger.debug(f"lgpio chip close: {e}")
 
             elif self.gpio_lib == "gpiozero":
                 # Properly close gpiozero LEDs
@@ -249,6 +268,7 @@ class LEDController:
 
             # Clear objects
             self.gpio_objects.clear()
+            self._write_led = self._write_none
             logger.info("🚥 GPIO cleanup complete")
 
         except Exception as e:
@@ -8,10 +8,16 @@ import os
 import time
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive connection pool for every SupervisorAPI instance; callers
+# create a new instance per operation, so a per-instance session wouldn't help
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 class SupervisorAPI:
     """Helper class for Home Assistant Supervisor API calls"""
     
@@ -34,7 +40,7 @@ class SupervisorAPI:
     def _test_connectivity(self):
         """Test if Supervisor API is accessible"""
         try:
-            response = requests.get(
+            response = _session.get(
                 f"{self.base_url}/network/info",
                 headers=self.headers,
                 timeout=5
@@ -59,7 +65,7 @@ class SupervisorAPI:
         """
         try:
             logger.debug("📡 Fetching network info from Supervisor API...")
-            response = requests.get(
+            response = _session.get(
                 f"{self.base_url}/network/info",
                 headers=self.headers,
                 timeout=10
@@ -90,7 +96,7 @@ class SupervisorAPI:
         """
         try:
             logger.info("📡 Scanning for WiFi networks via Supervisor API...")
-            response = requests.get(
+            response = _session.get(
                 f"{self.base_url}/network/interface/wlan0/accesspoints",
                 headers=self.headers,
                 timeout=30  # Scanning takes time
@@ -145,7 +151,7 @@ class SupervisorAPI:
                 "enabled": True
             }
             
-            response = requests.post(
+            response = _session.post(
                 f"{self.base_url}/network/interface/wlan0/update",
                 headers=self.headers,
                 json=payload,
@@ -189,7 +195,7 @@ class SupervisorAPI:
                 "enabled": False  # CRITICAL: False to disable WiFi interface
             }
             
-            response = requests.post(
+            response = _session.post(
                 f"{self.base_url}/network/interface/wlan0/update",
                 headers=self.headers,
                 json=payload,